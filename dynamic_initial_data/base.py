@@ -1,11 +1,53 @@
+import hashlib
+import importlib.util
+import inspect
+import io
+import json
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
 from django.apps import apps
 from django.contrib.contenttypes.models import ContentType
+from django.db import connection, connections, router
+from django.db.models.deletion import Collector
+from django.db.models.fields import AutoFieldMixin
 from django.db.transaction import atomic
 from django.utils import timezone
 from django.utils.module_loading import import_string
+from manager_utils import bulk_update
 
+from dynamic_initial_data.context import InitialDataContext
 from dynamic_initial_data.exceptions import InitialDataCircularDependency, InitialDataMissingApp
-from dynamic_initial_data.models import RegisteredForDeletionReceipt
+from dynamic_initial_data.instrumentation import RunReport
+from dynamic_initial_data.signals import MutedSignals
+from dynamic_initial_data.models import (
+    InitialDataCheckpoint, InitialDataFingerprint, InitialDataRun, RegisteredForDeletionGroup,
+    RegisteredForDeletionReceipt
+)
+
+
+def chunk_list(items, chunk_size):
+    """
+    Splits a list into consecutive lists of at most chunk_size items.
+    :param items: The list to split
+    :type items: list
+    :param chunk_size: The maximum number of items in each chunk
+    :type chunk_size: int
+    :rtype: generator
+    """
+    for i in range(0, len(items), chunk_size):
+        yield items[i:i + chunk_size]
+
+
+def escape_copy_value(value):
+    """
+    Escapes a value for the text format of the postgres COPY command.
+    :param value: The value to escape
+    :type value: str
+    :rtype: str
+    """
+    return value.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
 
 
 class BaseInitialData(object):
@@ -19,13 +61,43 @@ class BaseInitialData(object):
     """
     dependencies = []
 
+    # Whether the stale objects of a model are deleted with a raw delete, keyed on model class. A raw delete is a
+    # single delete statement that skips delete signals and cascades. Models that are not listed are deleted with a
+    # raw delete only when they have no delete signal receivers and no relations that need to be cascaded.
+    raw_delete_models = {}
+
+    # The number of model objects yielded by a generator `update_initial_data` that are saved and registered for
+    # deletion at a time
+    chunk_size = 1000
+
+    # The fields that identify the unsaved model objects yielded by a generator `update_initial_data`, keyed on model
+    # class. Every chunk of unsaved model objects is synced on these fields, so the model objects saved by earlier runs
+    # are updated in place instead of being created again. Models that are not listed are synced on their unique
+    # fields, and models without unique fields other than an auto incremented pk are bulk created by every run.
+    chunk_unique_fields = {}
+
     def __init__(self):
         # Keep track of any model objects that have been registered for deletion
         self.model_objs_registered_for_deletion = []
 
+        # Keep track of the pks of any model objects that have been registered for deletion without their
+        # instances, keyed on model class
+        self.pks_registered_for_deletion = defaultdict(set)
+
+        # The identity map of the run, which is shared with the apps this app depends on and the apps that depend on
+        # it. The updater replaces it with the context of the run before updating the initial data.
+        self.context = InitialDataContext()
+
+        # The muted signals of the run, which record the pks of the model objects saved by bulk operations. The updater
+        # replaces them with the muted signals of the run before updating the initial data.
+        self.muted_signals = MutedSignals()
+
     def get_model_objs_registered_for_deletion(self):
         return self.model_objs_registered_for_deletion
 
+    def get_pks_registered_for_deletion(self):
+        return self.pks_registered_for_deletion
+
     def register_for_deletion(self, *model_objs):
         """
         Registers model objects for deletion. This means the model object will be deleted from the system when it is
@@ -33,13 +105,243 @@ class BaseInitialData(object):
         """
         self.model_objs_registered_for_deletion.extend(model_objs)
 
+    def register_pks_for_deletion(self, model_class, pks):
+        """
+        Registers model objects for deletion by their pks. This behaves like `register_for_deletion` without
+        having to keep the model objects in memory.
+        :param model_class: The model class of the model objects
+        :type model_class: Model
+        :param pks: The pks of the model objects
+        :type pks: iterable
+        """
+        self.pks_registered_for_deletion[model_class].update(pks)
+
+    def register_queryset_for_deletion(self, queryset):
+        """
+        Registers every model object of a queryset for deletion. Only the pks of the model objects are fetched
+        and they are streamed from the database instead of being loaded at once.
+        :param queryset: The queryset of the model objects
+        :type queryset: QuerySet
+        """
+        self.register_pks_for_deletion(queryset.model, queryset.values_list('pk', flat=True).iterator())
+
+    def sync(self, model_class, rows, unique_fields, update_fields=None):
+        """
+        Makes the model objects of a model class match a list of rows with as few queries as possible. Existing
+        model objects are fetched with a single query and matched to the rows on their unique fields. Rows that do not
+        exist are bulk inserted and only the model objects whose update fields changed are bulk updated. Every synced
+        model object is registered for deletion, so model objects that stop being synced are deleted.
+        Example:
+            self.sync(Country, [{'code': 'US', 'name': 'United States'}], ['code'])
+        :param model_class: The model class of the model objects to sync
+        :type model_class: Model
+        :param rows: The field values of every model object keyed on field name. Foreign keys should be keyed on
+            their attname, such as `account_id`
+        :type rows: iterable of dict
+        :param unique_fields: The fields that uniquely identify a model object. The first field is used to fetch the
+            existing model objects
+        :type unique_fields: list of str
+        :param update_fields: The fields to update on existing model objects. Defaults to every field in the rows
+            that is neither a unique field nor the pk
+        :type update_fields: list of str
+        :return: The pks of the synced model objects keyed on the values of their unique fields, converted to the
+            python types of the fields. The values are tuples when there is more than one unique field
+        :rtype: dict
+        """
+        def get_key(values):
+            if len(unique_fields) == 1:
+                return values[unique_fields[0]]
+            return tuple(values[field] for field in unique_fields)
+
+        # Row values are converted to the python types of their fields, such as an integer given as a string, so that
+        # they match the values of existing model objects. Rows with the same unique field values are synced once,
+        # using the last of the rows.
+        opts = model_class._meta
+        rows_by_key = {}
+        for row in rows:
+            row = {field: opts.get_field(field).to_python(value) for field, value in row.items()}
+            rows_by_key[get_key(row)] = row
+        if update_fields is None:
+            update_fields = sorted(
+                {field for row in rows_by_key.values() for field in row} - set(unique_fields) - {'pk', opts.pk.attname})
+
+        # Fetch every existing model object that could match a row with a single query
+        existing_values_by_key = {
+            get_key(values): values
+            for values in model_class._base_manager.filter(**{
+                '{0}__in'.format(unique_fields[0]): {row[unique_fields[0]] for row in rows_by_key.values()}
+            }).values('pk', *unique_fields, *update_fields)
+        }
+
+        pks = {}
+        model_objs_to_create = []
+        model_objs_to_update = []
+        for key, row in rows_by_key.items():
+            existing_values = existing_values_by_key.get(key)
+            if existing_values is None:
+                model_objs_to_create.append(model_class(**row))
+                continue
+
+            pks[key] = existing_values['pk']
+            if any(field in row and row[field] != existing_values[field] for field in update_fields):
+                model_objs_to_update.append(model_class(pk=existing_values['pk'], **{
+                    field: row.get(field, existing_values[field])
+                    for field in update_fields
+                }))
+
+        model_class._base_manager.bulk_create(model_objs_to_create)
+        bulk_update(model_class._base_manager, model_objs_to_update, update_fields)
+
+        # Bulk operations do not send save signals, so the saved pks are recorded for muted models instead
+        self.muted_signals.record_saved(model_class, [
+            model_obj.pk for model_obj in model_objs_to_create + model_objs_to_update
+        ])
+
+        pks.update((get_key(model_obj.__dict__), model_obj.pk) for model_obj in model_objs_to_create)
+        self.register_pks_for_deletion(model_class, pks.values())
+
+        return pks
+
+    def get_chunk_unique_fields(self, model_class):
+        """
+        Determines the fields on which the unsaved model objects of a model class are synced when they are flushed.
+        These are the `chunk_unique_fields` of the model class, or else its first unique field, its first unique
+        together fields or its pk when the pk is neither auto incremented nor has a default, since such pks are
+        different on every run.
+        :param model_class: The model class of the model objects
+        :type model_class: Model
+        :return: The attnames of the unique fields or None if the model objects can only be created
+        :rtype: list of str or None
+        """
+        opts = model_class._meta
+        if model_class in self.chunk_unique_fields:
+            unique_fields = self.chunk_unique_fields[model_class]
+        else:
+            candidates = [[field.name] for field in opts.concrete_fields if field.unique and not field.primary_key]
+            candidates.extend(list(fields) for fields in opts.unique_together)
+            candidates.extend(list(constraint.fields) for constraint in opts.total_unique_constraints)
+            if not self.is_generated_pk(opts.pk):
+                candidates.append([opts.pk.name])
+            unique_fields = candidates[0] if candidates else None
+
+        return unique_fields and [opts.get_field(field).attname for field in unique_fields]
+
+    def is_generated_pk(self, field):
+        """
+        Returns whether a pk field gets its value from the database or from a default, such as an auto incremented
+        pk or a uuid pk with a default, instead of from the initial data.
+        :param field: The pk field of a model
+        :type field: Field
+        :rtype: bool
+        """
+        return isinstance(field, AutoFieldMixin) or field.has_default()
+
+    def flush(self, model_objs):
+        """
+        Saves the unsaved model objects and registers every model object for deletion by its pk. The unsaved model
+        objects of every model class are synced on the fields returned by `get_chunk_unique_fields`, which takes one
+        select, one bulk create and one bulk update, or are bulk created when the model has no fields to sync on. The
+        model objects registered with `register_for_deletion` since the last flush are registered by their pks as
+        well, so that no model objects are kept in memory.
+        :param model_objs: The saved and unsaved model objects to register for deletion
+        :type model_objs: list
+        """
+        model_objs_by_class = defaultdict(list)
+        for model_obj in model_objs + self.model_objs_registered_for_deletion:
+            model_objs_by_class[type(model_obj)].append(model_obj)
+        self.model_objs_registered_for_deletion = []
+
+        for model_class, model_objs_of_class in model_objs_by_class.items():
+            unsaved_model_objs = [model_obj for model_obj in model_objs_of_class if model_obj._state.adding]
+            unique_fields = self.get_chunk_unique_fields(model_class)
+            if unique_fields and unsaved_model_objs:
+                # Generated pks are left out so that unsaved model objects match the rows saved by earlier runs,
+                # unless the model objects are synced on them
+                fields = [
+                    field
+                    for field in model_class._meta.concrete_fields
+                    if not (field.primary_key and self.is_generated_pk(field) and field.attname not in unique_fields)
+                ]
+                self.sync(model_class, [
+                    {field.attname: getattr(model_obj, field.attname) for field in fields}
+                    for model_obj in unsaved_model_objs
+                ], unique_fields)
+            else:
+                model_class._base_manager.bulk_create(unsaved_model_objs)
+                self.muted_signals.record_saved(model_class, [model_obj.pk for model_obj in unsaved_model_objs])
+
+            self.register_pks_for_deletion(model_class, [
+                model_obj.pk
+                for model_obj in model_objs_of_class
+                if not (unique_fields and model_obj._state.adding)
+            ])
+
+    def get_fingerprint(self):
+        """
+        Returns a string that should change whenever the initial data changes for reasons other than the source of the
+        initial data module, such as data files that are loaded by `update_initial_data`. It is used to skip apps
+        whose initial data did not change when updating incrementally. Returns None by default.
+        """
+        return None
+
     def update_initial_data(self, *args, **kwargs):
         """
-        Raises an error if the subclass does not implement this
+        Raises an error if the subclass does not implement this. Subclasses can return a list of model objects to
+        register for deletion or be generators that yield model objects and lists of model objects. Yielded model
+        objects are consumed in chunks of `chunk_size`, syncing the unsaved ones on their unique fields and
+        registering all of them for deletion, so that large sets of initial data don't have to be kept in memory at
+        once.
+        Example:
+            def update_initial_data(self):
+                with open('countries.csv') as countries_file:
+                    for row in csv.DictReader(countries_file):
+                        yield Country(code=row['code'], name=row['name'])
         """
         raise NotImplementedError('{0} did not implement update_initial_data'.format(self))
 
 
+class InitialDataClassRegistry(object):
+    """
+    A process-wide cache of the initial data classes of apps that is shared by every updater, so that each app is
+    only resolved once per process. Apps without initial data are cached as None and apps whose modules are missing
+    are cached along with the error raised when importing them.
+    """
+    def __init__(self):
+        self.initial_data_classes = {}
+        self.import_errors = {}
+
+    def get(self, app, load):
+        """
+        Returns the cached initial data class of an app, loading it the first time the app is requested.
+        :param app: The name of the app. This should be the same path as defined in settings.INSTALLED_APPS
+        :type app: str
+        :param load: A function that loads the initial data class of an app
+        :type load: function
+        :rtype: BaseInitialData or None
+        """
+        if app in self.import_errors:
+            raise self.import_errors[app]
+
+        if app not in self.initial_data_classes:
+            try:
+                self.initial_data_classes[app] = load(app)
+            except ModuleNotFoundError as e:
+                self.import_errors[app] = e
+                raise
+
+        return self.initial_data_classes[app]
+
+    def clear(self):
+        """
+        Forgets every cached app, which is needed when the initial data modules of apps change within a process.
+        """
+        self.initial_data_classes.clear()
+        self.import_errors.clear()
+
+
+initial_data_class_registry = InitialDataClassRegistry()
+
+
 class InitialDataUpdater(object):
     """
     This object is created to handle the updating process of an app or multiple apps. A cache is
@@ -51,15 +353,71 @@ class InitialDataUpdater(object):
         options = options or {}
         self.verbose = options.get('verbose', False)
 
+        # Whether apps whose fingerprint did not change since the last successful run are skipped
+        self.incremental = options.get('incremental', False)
+
+        # The number of apps that can be updated at the same time. Apps are updated one after another in a single
+        # transaction unless this is more than one
+        self.jobs = options.get('jobs', None) or 1
+
+        # How often updated apps are committed when apps are updated one after another. Either all apps are committed
+        # together with the handling of deletions, every level of apps that do not depend on each other is committed
+        # on its own, or every app is committed on its own. Apps updated in parallel are always committed on their own.
+        self.commit = options.get('commit', None) or 'all'
+
+        # Whether apps that were committed by an interrupted run are skipped. Their checkpoints are loaded when the
+        # first app is updated and are keyed on app name.
+        self.resume = options.get('resume', False)
+        self.checkpoints = None
+
+        # The maximum number of stale model objects of one type that are deleted with a single queryset delete
+        self.deletion_chunk_size = options.get('deletion_chunk_size', None) or 1000
+
+        # The number of receipts from which receipts are copied into a temporary table and merged with a single
+        # statement on postgres instead of being upserted as model objects
+        self.copy_threshold = options.get('copy_threshold', None) or 10000
+
+        # How the objects registered for deletion are stored. Either every object has its own receipt, or on postgres
+        # the objects of every type registered by an app are stored together as a group. Runs that handle deletions
+        # have to keep using the same backend, since each backend only knows about the objects it stored.
+        self.receipts = options.get('receipts', None) or 'rows'
+
+        # Whether the objects of a model can be deleted with a raw delete, keyed on model class
+        self.raw_deletable_models = {}
+
+        # The models whose save and delete signals are muted while apps are updated. A single initial_data_changed
+        # signal is sent for each of them at the end of the run instead.
+        self.muted_signals = MutedSignals(options.get('mute_signals', None))
+
+        # The identity map through which apps share model objects with the apps that depend on them
+        self.context = InitialDataContext(options.get('context_size', None))
+
         # Apps that have been updated so far. This allows us to process dependencies on other app
         # inits easier without performing redundant work
         self.updated_apps = set()
 
-        # A cache of the apps that have been imported for data initialization
-        self.loaded_apps = {}
+        # A process-wide cache of the apps that have been imported for data initialization
+        self.loaded_apps = initial_data_class_registry
 
-        # A list of all models that have been registered for deletion
-        self.model_objs_registered_for_deletion = []
+        # The initial data classes of every app in the dependency graph, where apps without initial data are None,
+        # and the dependencies of every app with initial data. Both are keyed on app name.
+        self.initial_data_classes = {}
+        self.dependency_graph = {}
+
+        # The pks of the model objects that have been registered for deletion, keyed on the app that registered
+        # them and then on the content type id of the model objects. Only pks are kept so that model objects of
+        # apps that were already updated can be garbage collected.
+        self.pks_registered_for_deletion = {}
+
+        # The fingerprints of the updated apps and the fingerprints stored by the last successful run, keyed on app
+        # name. Apps that were skipped because their fingerprint did not change are also kept track of.
+        self.fingerprints = {}
+        self.stored_fingerprints = None
+        self.skipped_apps = set()
+
+        # The timing, query count and memory of every app update and of handling deletions, which are only
+        # measured when instrumentation is enabled
+        self.run_report = RunReport(enabled=options.get('instrument', False))
 
     def get_class_path(self, app):
         """
@@ -72,34 +430,221 @@ class InitialDataUpdater(object):
         """
         return '{0}.fixtures.initial_data.InitialData'.format(app)
 
+    def has_initial_data_module(self, app):
+        """
+        Determines if an app has an initial data module by finding the module without importing it. Only the
+        package of the app and its fixtures package are imported, so apps without fixtures are never searched for
+        further. Apps that cannot be found themselves are assumed to have initial data so that loading them raises.
+        :param app: The name of the app. This should be the same path as defined in settings.INSTALLED_APPS
+        :type app: str
+        :rtype: bool
+        """
+        module_name = self.get_class_path(app).rpartition('.')[0]
+        try:
+            return importlib.util.find_spec(module_name) is not None
+        except ModuleNotFoundError as e:
+            return e.name != module_name.rpartition('.')[0]
+
     def load_app(self, app):
         """
-        Tries to load an initial data class for a specified app. If the specified file does not exist,
-        an error will be raised. If the class does exist, but it isn't a subclass of `BaseInitialData`
-        then None will be returned.
+        Tries to load an initial data class for a specified app. Loaded classes, apps without initial data and
+        missing modules are cached for the whole process. If the app does not have an initial data file,
+        None will be returned without importing anything besides the app and its fixtures package. If the
+        app cannot be imported, an error will be raised. If the class does exist, but it isn't a subclass
+        of `BaseInitialData` then None will be returned.
         :param app: The name of the app in which to load the initial data class. This should be the same
             path as defined in settings.INSTALLED_APPS
         :type app: str
         :return: A subclass instance of BaseInitialData or None
         :rtype: BaseInitialData or None
         """
-        if self.loaded_apps.get(app):
-            return self.loaded_apps.get(app)
+        return self.loaded_apps.get(app, self.import_app)
+
+    def import_app(self, app):
+        """
+        Imports the initial data class of an app without caching it.
+        :param app: The name of the app. This should be the same path as defined in settings.INSTALLED_APPS
+        :type app: str
+        :rtype: BaseInitialData or None
+        """
+        if not self.has_initial_data_module(app):
+            self.log('No initial data file for {0}'.format(app))
+            return None
 
-        self.loaded_apps[app] = None
         initial_data_class = import_string(self.get_class_path(app))
-        if issubclass(initial_data_class, BaseInitialData):
-            self.log('Loaded app {0}'.format(app))
-            self.loaded_apps[app] = initial_data_class
+        if not issubclass(initial_data_class, BaseInitialData):
+            return None
+
+        self.log('Loaded app {0}'.format(app))
+        return initial_data_class
+
+    def load_dependency(self, app):
+        """
+        Loads the initial data class of an app that another app depends on. An `InitialDataMissingApp` exception
+        is raised if the initial data class cannot be loaded.
+        :param app: The name of the app. This should be the same path as defined in settings.INSTALLED_APPS
+        :type app: str
+        :rtype: BaseInitialData
+        """
+        try:
+            initial_data_class = self.load_app(app)
+        except ImportError:
+            raise InitialDataMissingApp(dep=app)
+
+        if initial_data_class is None:
+            raise InitialDataMissingApp(dep=app)
+
+        return initial_data_class
+
+    def get_dependency_graph(self, app_names):
+        """
+        Builds an adjacency index of the dependencies of the specified apps and all of their transitive dependencies.
+        Every initial data class is loaded only once since the index is kept for the lifetime of the updater. Apps in
+        app_names that do not have initial data are left out of the index, while dependencies that cannot be loaded
+        raise an `InitialDataMissingApp` exception.
+        :param app_names: The names of the apps to build the index for. These should be the same paths as defined
+            in settings.INSTALLED_APPS
+        :type app_names: list
+        :return: The dependencies of every app in the index keyed on app name
+        :rtype: dict
+        """
+        apps_to_index = []
+        for app in app_names:
+            if app not in self.initial_data_classes:
+                self.initial_data_classes[app] = self.load_app(app)
+                if self.initial_data_classes[app] is not None:
+                    apps_to_index.append(app)
+
+        while apps_to_index:
+            app = apps_to_index.pop()
+            if app not in self.initial_data_classes:
+                self.initial_data_classes[app] = self.load_dependency(app)
+            elif self.initial_data_classes[app] is None:
+                # A dependency was previously found to not have initial data
+                raise InitialDataMissingApp(dep=app)
+
+            if app not in self.dependency_graph:
+                self.dependency_graph[app] = list(self.initial_data_classes[app].dependencies)
+                apps_to_index.extend(self.dependency_graph[app])
 
-        return self.loaded_apps[app]
+        return self.dependency_graph
+
+    def get_update_plan(self, app_names):
+        """
+        Produces the order in which the specified apps and their dependencies need to be updated. Every app is placed
+        after its dependencies and every dependency cycle is found in a single pass over the dependency graph. Apps
+        that have already been updated or that do not have initial data are left out of the plan.
+        :param app_names: The names of the apps to plan. These should be the same paths as defined
+            in settings.INSTALLED_APPS
+        :type app_names: list
+        :return: The names of the apps to update in order
+        :rtype: list
+        :raises InitialDataCircularDependency: If any dependency cycles are found
+        """
+        graph = self.get_dependency_graph(app_names)
+
+        plan = []
+        cycles = []
+        for app, component in self.get_strongly_connected_components(graph, app_names):
+            if len(component) > 1 or app in graph[app]:
+                cycles.append(self.get_cycle(graph, app, component))
+            else:
+                plan.append(app)
+
+        if cycles:
+            raise InitialDataCircularDependency(cycles=cycles)
+
+        return plan
+
+    def get_strongly_connected_components(self, graph, app_names):
+        """
+        Finds the strongly connected components of the dependency graph that are reachable from the specified apps
+        with Tarjan's algorithm. Components are produced in dependency order, so every component comes after the
+        components it depends on. Apps that have already been updated are not visited.
+        :param graph: The dependencies of every app keyed on app name
+        :type graph: dict
+        :param app_names: The names of the apps in which to start the search
+        :type app_names: list
+        :return: A generator of the root app and the set of apps of every component
+        :rtype: generator
+        """
+        # The discovery index and lowest reachable index of every visited app
+        indexes = {}
+        low_links = {}
+
+        # The visited apps that have not been assigned to a component yet. Dicts keep their insertion order, so this
+        # doubles as the stack of Tarjan's algorithm with constant time membership checks.
+        component_stack = {}
+
+        for root in app_names:
+            if root in graph and root not in indexes and root not in self.updated_apps:
+                yield from self.walk_strongly_connected_components(graph, root, indexes, low_links, component_stack)
+
+    def walk_strongly_connected_components(self, graph, root, indexes, low_links, component_stack):
+        """
+        Performs the depth first search of Tarjan's algorithm from a single root app. The search is iterative so that
+        deep dependency chains do not hit the recursion limit.
+        :return: A generator of the root app and the set of apps of every component that is completed
+        :rtype: generator
+        """
+        indexes[root] = low_links[root] = len(indexes)
+        component_stack[root] = True
+        work_stack = [(root, iter(graph[root]))]
+        while work_stack:
+            app, dependencies = work_stack[-1]
+            for dependency in dependencies:
+                if dependency not in indexes and dependency not in self.updated_apps:
+                    indexes[dependency] = low_links[dependency] = len(indexes)
+                    component_stack[dependency] = True
+                    work_stack.append((dependency, iter(graph[dependency])))
+                    break
+                elif dependency in component_stack:
+                    low_links[app] = min(low_links[app], indexes[dependency])
+            else:
+                work_stack.pop()
+                if work_stack:
+                    parent = work_stack[-1][0]
+                    low_links[parent] = min(low_links[parent], low_links[app])
+
+                if low_links[app] == indexes[app]:
+                    # The app is the root of a component, which holds every app above it on the stack
+                    component = set()
+                    while app not in component:
+                        component.add(component_stack.popitem()[0])
+                    yield app, component
+
+    def get_cycle(self, graph, app, component):
+        """
+        Finds the shortest dependency cycle that starts and ends with an app in a strongly connected component.
+        :param graph: The dependencies of every app keyed on app name
+        :type graph: dict
+        :param app: The name of the app in which to start the cycle
+        :type app: str
+        :param component: The names of the apps in the strongly connected component of the app
+        :type component: set
+        :return: The names of the apps in the cycle, starting with the app
+        :rtype: list
+        """
+        previous_apps = {}
+        apps_to_visit = deque([app])
+        while apps_to_visit:
+            current_app = apps_to_visit.popleft()
+            for dependency in graph[current_app]:
+                if dependency == app:
+                    cycle = [current_app]
+                    while cycle[-1] != app:
+                        cycle.append(previous_apps[cycle[-1]])
+                    return cycle[::-1]
+                elif dependency in component and dependency not in previous_apps:
+                    previous_apps[dependency] = current_app
+                    apps_to_visit.append(dependency)
 
     @atomic
     def update_app(self, app):
         """
         Loads and runs `update_initial_data` of the specified app. Any dependencies contained within the
-        initial data class will be run recursively. Dependency cycles are checked for and a cache is built
-        for updated apps to prevent updating the same app more than once.
+        initial data class will be updated first in the order of the update plan. Dependency cycles are checked
+        for and a cache is built for updated apps to prevent updating the same app more than once.
         :param app: The name of the app to update. This should be the same path as defined
             in settings.INSTALLED_APPS
         :type app: str
@@ -108,128 +653,750 @@ class InitialDataUpdater(object):
         if app in self.updated_apps:
             return
 
-        # load the initial data class
+        with self.muted_signals:
+            for planned_app in self.get_update_plan([app]):
+                self.run_app(planned_app)
+
+    def run_app(self, app):
+        """
+        Runs `update_initial_data` of an app whose dependencies have already been updated.
+        :param app: The name of the app to update. This should be the same path as defined
+            in settings.INSTALLED_APPS
+        :type app: str
+        :return: True if the app was updated or False if it was skipped
+        :rtype: bool
+        """
+        if self.skip_app(app):
+            return False
+
+        # Keep track of the objects to be deleted from the app for when deletions are handled.
+        self.pks_registered_for_deletion[app] = self.run_initial_data(app)
+
+        # keep track that this app has been updated
+        self.updated_apps.add(app)
+        return True
+
+    def skip_app(self, app):
+        """
+        Determines if an app can be skipped because its fingerprint did not change or because it was committed by
+        the interrupted run that is being resumed.
+        :param app: The name of the app. This should be the same path as defined in settings.INSTALLED_APPS
+        :type app: str
+        :return: True if the app was skipped
+        :rtype: bool
+        """
+        return self.skip_unchanged_app(app) or self.skip_committed_app(app)
+
+    def skip_committed_app(self, app):
+        """
+        Determines if an app can be skipped when resuming because the interrupted run committed it and its
+        fingerprint did not change since. Apps without a fingerprint are never skipped since they cannot be compared.
+        The objects it registered for deletion are restored from its checkpoint so
+        that deletions are handled as if the app was updated again.
+        :param app: The name of the app. This should be the same path as defined in settings.INSTALLED_APPS
+        :type app: str
+        :return: True if the app was skipped
+        :rtype: bool
+        """
+        if not self.resume or self.fingerprints[app] is None:
+            return False
+
+        if self.checkpoints is None:
+            self.checkpoints = {checkpoint.app: checkpoint for checkpoint in InitialDataCheckpoint.objects.all()}
+        checkpoint = self.checkpoints.get(app)
+        if checkpoint is None or checkpoint.fingerprint != self.fingerprints[app]:
+            return False
+
+        self.log('Resuming after committed app {0}'.format(app))
+        self.pks_registered_for_deletion[app] = {
+            int(model_obj_type_id): set(self.to_pks(int(model_obj_type_id), pks))
+            for model_obj_type_id, pks in checkpoint.pks_registered_for_deletion.items()
+        }
+        self.updated_apps.add(app)
+        return True
+
+    def skip_unchanged_app(self, app):
+        """
+        Computes the fingerprint of an app and determines if the app can be skipped when updating incrementally
+        because its fingerprint is the same as in the last successful run. Skipped apps are considered updated.
+        :param app: The name of the app. This should be the same path as defined in settings.INSTALLED_APPS
+        :type app: str
+        :return: True if the app was skipped
+        :rtype: bool
+        """
+        self.fingerprints[app] = self.get_fingerprint(app)
+        if not self.incremental or self.fingerprints[app] is None:
+            return False
+
+        if self.stored_fingerprints is None:
+            self.stored_fingerprints = dict(InitialDataFingerprint.objects.values_list('app', 'fingerprint'))
+        if self.stored_fingerprints.get(app) != self.fingerprints[app]:
+            return False
+
+        self.log('Skipping unchanged app {0}'.format(app))
+        self.skipped_apps.add(app)
+        self.updated_apps.add(app)
+        return True
+
+    def get_fingerprint(self, app):
+        """
+        Computes a fingerprint of an app from the source of its initial data module, its declared dependencies,
+        the `get_fingerprint` of its initial data and the fingerprints of its dependencies, which have to be
+        computed first. The fingerprint is None if the source of the app or one of its dependencies is unavailable.
+        :param app: The name of the app. This should be the same path as defined in settings.INSTALLED_APPS
+        :type app: str
+        :rtype: str or None
+        """
+        initial_data_class = self.initial_data_classes[app]
         try:
-            initial_data_class = self.load_app(app)
-        except ImportError as e:
-            message = str(e)
+            source = inspect.getsource(inspect.getmodule(initial_data_class))
+        except (OSError, TypeError):
+            return None
+
+        dependency_fingerprints = [self.fingerprints.get(dependency) for dependency in self.dependency_graph[app]]
+        if None in dependency_fingerprints:
+            return None
+
+        fingerprint = hashlib.sha256(source.encode())
+        fingerprint.update(json.dumps([
+            self.dependency_graph[app], initial_data_class().get_fingerprint(), dependency_fingerprints
+        ]).encode())
+        return fingerprint.hexdigest()
+
+    def save_fingerprints(self):
+        """
+        Stores the fingerprints of the updated apps after a successful run so that unchanged apps can be skipped by
+        the next incremental run.
+        """
+        now = timezone.now()
+        InitialDataFingerprint.objects.bulk_upsert([
+            InitialDataFingerprint(app=app, fingerprint=fingerprint, update_time=now)
+            for app, fingerprint in self.fingerprints.items()
+            if fingerprint is not None
+        ], ['app'], update_fields=['fingerprint', 'update_time'])
+
+    def run_initial_data(self, app):
+        """
+        Instantiates the initial data class of an app and runs its `update_initial_data`.
+        :param app: The name of the app to update. This should be the same path as defined
+            in settings.INSTALLED_APPS
+        :type app: str
+        :return: The pks of the model objects that the app registered for deletion keyed on content type id
+        :rtype: dict
+        """
+        self.log('Updating app {0}'.format(app))
+
+        with self.run_report.measure('update_app', app) as metrics:
+            # Update the initial data of the app and gather any objects returned for deletion. Objects registered for
+            # deletion can either be returned from the update_initial_data function or programmatically added with
+            # the register_for_deletion functions in the BaseInitialData class.
+            initial_data_instance = self.initial_data_classes[app]()
+            initial_data_instance.context = self.context
+            initial_data_instance.muted_signals = self.muted_signals
+            model_objs_registered_for_deletion = initial_data_instance.update_initial_data() or []
+            if inspect.isgenerator(model_objs_registered_for_deletion):
+                self.consume_initial_data(initial_data_instance, model_objs_registered_for_deletion)
+                model_objs_registered_for_deletion = []
+            model_objs_registered_for_deletion.extend(initial_data_instance.get_model_objs_registered_for_deletion())
+
+            pks_by_content_type = self.get_pks_by_content_type(
+                model_objs_registered_for_deletion, initial_data_instance.get_pks_registered_for_deletion())
+            metrics.rows_registered = sum(len(pks) for pks in pks_by_content_type.values())
+
+        return pks_by_content_type
+
+    def consume_initial_data(self, initial_data_instance, model_objs):
+        """
+        Consumes the model objects yielded by a generator `update_initial_data` in chunks, flushing every chunk
+        before the next one is generated.
+        :param initial_data_instance: The initial data instance that generates the model objects
+        :type initial_data_instance: BaseInitialData
+        :param model_objs: The generator of model objects and lists of model objects
+        :type model_objs: generator
+        """
+        # Lists of model objects are yielded by generators that build their model objects in batches
+        model_objs = (
+            model_obj
+            for item in model_objs
+            for model_obj in (item if isinstance(item, (list, tuple)) else [item])
+        )
 
-            # Check if this error is simply the app not having initial data
-            if 'No module named' in message and 'fixtures' in message:
-                self.log('No initial data file for {0}'.format(app))
+        chunk = list(islice(model_objs, initial_data_instance.chunk_size))
+        while chunk:
+            initial_data_instance.flush(chunk)
+            chunk = list(islice(model_objs, initial_data_instance.chunk_size))
+
+    def to_pks(self, model_obj_type_id, model_obj_ids):
+        """
+        Converts pks stored as text to the type of the pk of the model of a content type. Pks of content types that
+        no longer have a model are left as text.
+        :param model_obj_type_id: The id of the content type of the model objects
+        :type model_obj_type_id: int
+        :param model_obj_ids: The pks of the model objects as text
+        :type model_obj_ids: iterable
+        :rtype: list
+        """
+        model_class = ContentType.objects.get_for_id(model_obj_type_id).model_class()
+        if model_class is None:
+            return list(model_obj_ids)
+        return [model_class._meta.pk.to_python(model_obj_id) for model_obj_id in model_obj_ids]
+
+    def get_pks_by_content_type(self, model_objs, pks_by_model_class=None):
+        """
+        Converts model objects and the pks of model objects keyed on model class to sets of pks keyed on the content
+        type id of their model class. Proxy models have their own content types.
+        :param model_objs: The model objects to convert
+        :type model_objs: list
+        :param pks_by_model_class: The pks to convert keyed on model class
+        :type pks_by_model_class: dict
+        :rtype: dict
+        """
+        pks_by_content_type = defaultdict(set)
+        for model_obj in model_objs:
+            model_obj_type = ContentType.objects.get_for_model(model_obj, for_concrete_model=False)
+            pks_by_content_type[model_obj_type.id].add(model_obj.pk)
+
+        for model_class, pks in (pks_by_model_class or {}).items():
+            model_obj_type = ContentType.objects.get_for_model(model_class, for_concrete_model=False)
+            pks_by_content_type[model_obj_type.id].update(pks)
+
+        return pks_by_content_type
+
+    def run_initial_data_in_transaction(self, app):
+        """
+        Runs the initial data of an app in its own transaction and records that it was committed. This is used by
+        worker threads, which each have their own database connection. The connection is closed afterwards so that
+        worker threads don't leak connections, and the muted signals of the app are forgotten unless the app committed.
+        :param app: The name of the app to update. This should be the same path as defined
+            in settings.INSTALLED_APPS
+        :type app: str
+        :return: The pks of the model objects that the app registered for deletion keyed on content type id
+        :rtype: dict
+        """
+        try:
+            with atomic():
+                pks_registered_for_deletion = self.run_initial_data(app)
+                self.save_checkpoint(app, pks_registered_for_deletion)
+            self.muted_signals.commit()
+            return pks_registered_for_deletion
+        finally:
+            self.muted_signals.rollback()
+            connection.close()
+
+    def handle_deletions(self, app_names=None):
+        """
+        Manages handling deletions of objects that were previously managed by the initial data process but no longer
+        managed. It does so by mantaining a receipt per app for every model object that the app registered for
+        deletion. Receipts are created when their objects are registered for the first time and are left as they are
+        while their objects keep being registered. The receipts of the reconciled apps whose objects were not
+        registered again are stale and will be deleted, along with their model objects unless another app still has a
+        receipt for them.
+        :param app_names: The names of the apps whose receipts are reconciled. Every app that registers a model object
+            has its own receipt for it. If None, the receipts of every app are reconciled.
+        :type app_names: iterable
+        """
+
+        with self.run_report.measure('handle_deletions') as metrics:
+            # Gather the pks registered by every app in the text form they are stored in, so that the same pk
+            # registered as different types, such as a uuid and its string, is only stored once per app.
+            registered_pks = {
+                (app, model_obj_type_id): {str(pk) for pk in pks}
+                for app, pks_by_content_type in self.pks_registered_for_deletion.items()
+                for model_obj_type_id, pks in pks_by_content_type.items()
+            }
+
+            now = timezone.now()
+            metrics.rows_registered = sum(len(pks) for pks in registered_pks.values())
+            if self.receipts == 'groups':
+                # Start a new generation of groups. Only the latest run is kept since generations only have to
+                # increase.
+                generation = InitialDataRun.objects.create(start_time=now).id
+                InitialDataRun.objects.filter(id__lt=generation).delete()
+                self.replace_receipt_groups(registered_pks, now, generation, app_names)
                 return
+
+            # The receipts of the reconciled apps are stale when their apps did not register their objects again. The
+            # receipts of apps that were skipped are carried forward since their apps would have registered the same
+            # objects.
+            reconciled_receipts = RegisteredForDeletionReceipt.objects.exclude(app__in=self.skipped_apps)
+            if app_names is not None:
+                reconciled_receipts = reconciled_receipts.filter(app__in=set(app_names))
+
+            # Only the receipts of objects that were registered for the first time are written, so the receipts of
+            # objects that are registered by every run are never rewritten.
+            if connection.vendor == 'postgresql' and metrics.rows_registered >= self.copy_threshold:
+                stale_receipts = self.copy_receipts(registered_pks, now, reconciled_receipts)
             else:
-                # This is an actual import error we should know about
-                raise
+                stale_receipts = self.insert_receipts(registered_pks, now, reconciled_receipts)
 
-        self.log('Checking dependencies for {0}'.format(app))
+            # Delete the stale receipts and their associated model objects
+            self.delete_stale_receipts(stale_receipts)
 
-        # get dependency list
-        dependencies = self.get_dependency_call_list(app)
+    def insert_receipts(self, registered_pks, register_time, reconciled_receipts):
+        """
+        Creates the receipts of the objects that were registered for deletion for the first time with a bulk create
+        and finds the stale receipts. It is used for fewer registered pks than the copy threshold and on databases
+        other than postgres. The reconciled receipts are streamed once and compared with the registered pks in memory,
+        and only the receipts of registering apps that are not reconciled, which are usually none, are fetched on top.
+        :param registered_pks: The pks registered by every app as text keyed on app and content type id
+        :type registered_pks: dict
+        :param register_time: The registration time of the new receipts
+        :type register_time: datetime
+        :param reconciled_receipts: The receipts that are stale unless their objects were registered again
+        :type reconciled_receipts: QuerySet
+        :return: The id, content type id and pk of every stale receipt
+        :rtype: list of tuple
+        """
+        registered_receipts = {
+            (app, model_obj_type_id, pk)
+            for (app, model_obj_type_id), pks in registered_pks.items()
+            for pk in pks
+        }
+        existing_receipts = set(RegisteredForDeletionReceipt.objects.filter(
+            app__in={app for app, model_obj_type_id in registered_pks}
+        ).exclude(id__in=reconciled_receipts.values('id')).values_list('app', 'model_obj_type_id', 'model_obj_id'))
 
-        # update initial data of dependencies
-        for dependency in dependencies:
-            self.update_app(dependency)
+        stale_receipts = []
+        for receipt_id, app, model_obj_type_id, model_obj_id in reconciled_receipts.values_list(
+                'id', 'app', 'model_obj_type_id', 'model_obj_id').iterator():
+            if (app, model_obj_type_id, model_obj_id) in registered_receipts:
+                existing_receipts.add((app, model_obj_type_id, model_obj_id))
+            else:
+                stale_receipts.append((receipt_id, model_obj_type_id, model_obj_id))
 
-        self.log('Updating app {0}'.format(app))
+        RegisteredForDeletionReceipt.objects.bulk_create([
+            RegisteredForDeletionReceipt(
+                model_obj_type_id=model_obj_type_id,
+                model_obj_id=pk,
+                register_time=register_time,
+                app=app)
+            for app, model_obj_type_id, pk in registered_receipts - existing_receipts
+        ])
 
-        # Update the initial data of the app and gather any objects returned for deletion. Objects registered for
-        # deletion can either be returned from the update_initial_data function or programmatically added with the
-        # register_for_deletion function in the BaseInitialData class.
-        initial_data_instance = initial_data_class()
-        model_objs_registered_for_deletion = initial_data_instance.update_initial_data() or []
-        model_objs_registered_for_deletion.extend(initial_data_instance.get_model_objs_registered_for_deletion())
+        return stale_receipts
 
-        # Add the objects to be deleted from the app to the global list of objects to be deleted.
-        self.model_objs_registered_for_deletion.extend(model_objs_registered_for_deletion)
+    def copy_receipts(self, registered_pks, register_time, reconciled_receipts):
+        """
+        Creates the receipts of the objects that were registered for deletion for the first time on postgres by
+        streaming the registered pks into a temporary table with COPY, inserting the pks without receipts with a
+        single statement and finding the stale receipts with an anti-join against the temporary table. No receipt
+        model objects are built and no statement grows with the number of receipts.
+        :param registered_pks: The pks registered by every app as text keyed on app and content type id
+        :type registered_pks: dict
+        :param register_time: The registration time of the new receipts
+        :type register_time: datetime
+        :param reconciled_receipts: The receipts that are stale unless their objects were registered again
+        :type reconciled_receipts: QuerySet
+        :return: The id, content type id and pk of every stale receipt
+        :rtype: list of tuple
+        """
+        # Pks and app names are escaped since text pks can contain the tabs, newlines and backslashes of the format
+        rows = (
+            '{0}\t{1}\t{2}\n'.format(model_obj_type_id, escape_copy_value(pk), escape_copy_value(app))
+            for (app, model_obj_type_id), pks in registered_pks.items()
+            for pk in pks
+        )
+        copy_sql = 'COPY dynamic_initial_data_registered_pk (model_obj_type_id, model_obj_id, app) FROM STDIN'
+        receipt_table = connection.ops.quote_name(RegisteredForDeletionReceipt._meta.db_table)
+        match_sql = (
+            'registered.model_obj_type_id = receipt.model_obj_type_id AND '
+            'registered.model_obj_id = receipt.model_obj_id AND registered.app = receipt.app'
+        )
 
-        # keep track that this app has been updated
-        self.updated_apps.add(app)
+        with atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE TEMPORARY TABLE dynamic_initial_data_registered_pk '
+                '(model_obj_type_id integer, model_obj_id varchar(255), app varchar(256)) ON COMMIT DROP'
+            )
+
+            if hasattr(cursor.cursor, 'copy_expert'):
+                # psycopg2 copies from files, so the rows are copied in chunks of the copy threshold to bound memory
+                for chunk in iter(lambda: ''.join(islice(rows, self.copy_threshold)), ''):
+                    cursor.cursor.copy_expert(copy_sql, io.StringIO(chunk))
+            else:
+                with cursor.cursor.copy(copy_sql) as copy:
+                    for row in rows:
+                        copy.write(row)
+            cursor.execute('ANALYZE dynamic_initial_data_registered_pk')
 
-    def handle_deletions(self):
+            # Pks that already have receipts are left out before inserting, which keeps them from using up ids of the
+            # receipt sequence
+            cursor.execute(
+                'INSERT INTO {0} (model_obj_type_id, model_obj_id, register_time, app) '
+                'SELECT model_obj_type_id, model_obj_id, %s, app FROM dynamic_initial_data_registered_pk '
+                'registered WHERE NOT EXISTS (SELECT 1 FROM {0} receipt WHERE {1}) '
+                'ON CONFLICT (model_obj_type_id, model_obj_id, app) DO NOTHING'.format(receipt_table, match_sql),
+                [register_time]
+            )
+
+            reconciled_sql, reconciled_params = reconciled_receipts.values('id').query.sql_with_params()
+            cursor.execute(
+                'SELECT receipt.id, receipt.model_obj_type_id, receipt.model_obj_id FROM {0} receipt '
+                'WHERE receipt.id IN ({1}) AND NOT EXISTS ('
+                'SELECT 1 FROM dynamic_initial_data_registered_pk registered WHERE {2})'.format(
+                    receipt_table, reconciled_sql, match_sql),
+                reconciled_params
+            )
+            stale_receipts = cursor.fetchall()
+            cursor.execute('DROP TABLE dynamic_initial_data_registered_pk')
+
+        return stale_receipts
+
+    def replace_receipt_groups(self, registered_pks, register_time, generation, app_names=None):
         """
-        Manages handling deletions of objects that were previously managed by the initial data process but no longer
-        managed. It does so by mantaining a list of receipts for model objects that are registered for deletion on
-        each round of initial data processing. Any receipts that are from previous rounds and not the current
-        round will be deleted.
+        Stores the objects registered for deletion as a group per app and content type and deletes the objects that
+        no group holds anymore. The groups of the new generation are added first. The groups they replace are the
+        earlier groups of the reconciled apps that were not skipped, and the stale objects are found with a single
+        query as the pks of the replaced groups except the pks of every group that is kept, which includes the groups
+        of other apps that registered the same objects.
+        :param registered_pks: The pks registered by every app as text keyed on app and content type id
+        :type registered_pks: dict
+        :param register_time: The registration time of the groups
+        :type register_time: datetime
+        :param generation: The generation of the groups
+        :type generation: int
+        :param app_names: The names of the apps whose groups are replaced. If None, the groups of every app are
+            replaced.
+        :type app_names: iterable
         """
+        RegisteredForDeletionGroup.objects.bulk_create([
+            RegisteredForDeletionGroup(
+                app=app,
+                model_obj_type_id=model_obj_type_id,
+                model_obj_ids=sorted(pks),
+                register_time=register_time,
+                generation=generation)
+            for (app, model_obj_type_id), pks in registered_pks.items()
+        ])
 
-        deduplicated_objs = {}
-        for model in self.model_objs_registered_for_deletion:
-            key = '{0}:{1}'.format(
-                ContentType.objects.get_for_model(model, for_concrete_model=False),
-                model.id
+        replaced_groups = RegisteredForDeletionGroup.objects.filter(generation__lt=generation).exclude(
+            app__in=self.skipped_apps)
+        if app_names is not None:
+            # No groups are replaced when none of the apps has initial data, and an empty filter cannot be compiled
+            # into the query below
+            app_names = set(app_names)
+            if not app_names:
+                return
+            replaced_groups = replaced_groups.filter(app__in=app_names)
+
+        model_obj_ids_by_type = defaultdict(list)
+        replaced_sql, replaced_params = replaced_groups.values('id').query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT model_obj_type_id, unnest(model_obj_ids) FROM {0} WHERE id IN ({1}) '
+                'EXCEPT SELECT model_obj_type_id, unnest(model_obj_ids) FROM {0} WHERE id NOT IN ({1})'.format(
+                    connection.ops.quote_name(RegisteredForDeletionGroup._meta.db_table), replaced_sql),
+                replaced_params * 2
             )
-            deduplicated_objs[key] = model
+            for model_obj_type_id, model_obj_id in cursor:
+                model_obj_ids_by_type[model_obj_type_id].append(model_obj_id)
 
-        # Create receipts for every object registered for deletion
-        now = timezone.now()
-        registered_for_deletion_receipts = [
-            RegisteredForDeletionReceipt(
-                model_obj_type=ContentType.objects.get_for_model(model_obj, for_concrete_model=False),
-                model_obj_id=model_obj.id,
-                register_time=now)
-            for model_obj in deduplicated_objs.values()
-        ]
-
-        # Do a bulk upsert on all of the receipts, updating their registration time.
-        RegisteredForDeletionReceipt.objects.bulk_upsert(
-            registered_for_deletion_receipts, ['model_obj_type_id', 'model_obj_id'], update_fields=['register_time'])
-
-        # Delete all receipts and their associated model objects that weren't updated
-        for receipt in RegisteredForDeletionReceipt.objects.exclude(register_time=now):
+        for model_obj_type_id, model_obj_ids in model_obj_ids_by_type.items():
+            model_class = ContentType.objects.get_for_id(model_obj_type_id).model_class()
+            if model_class is not None:
+                for model_obj_ids_chunk in chunk_list(model_obj_ids, self.deletion_chunk_size):
+                    self.delete_model_objs(model_class, self.to_pks(model_obj_type_id, model_obj_ids_chunk))
+
+        replaced_groups.delete()
+
+    def delete_stale_receipts(self, stale_receipts):
+        """
+        Deletes stale receipts along with their model objects, unless another app still has a receipt for a model
+        object. Receipts are grouped by content type so that each model's objects are deleted with one queryset
+        delete per chunk instead of resolving and deleting every model object on its own.
+        :param stale_receipts: The id, content type id and pk of every receipt of a model object that is no longer
+            registered by its app
+        :type stale_receipts: iterable of tuple
+        """
+        receipt_ids_by_type = defaultdict(lambda: defaultdict(list))
+        for receipt_id, model_obj_type_id, model_obj_id in stale_receipts:
+            receipt_ids_by_type[model_obj_type_id][model_obj_id].append(receipt_id)
+
+        for model_obj_type_id, receipt_ids_by_pk in receipt_ids_by_type.items():
+            # The content type may no longer have a model, in which case only the receipts can be deleted
+            model_class = ContentType.objects.get_for_id(model_obj_type_id).model_class()
+            for model_obj_ids_chunk in chunk_list(sorted(receipt_ids_by_pk), self.deletion_chunk_size):
+                RegisteredForDeletionReceipt.objects.filter(id__in=[
+                    receipt_id
+                    for model_obj_id in model_obj_ids_chunk
+                    for receipt_id in receipt_ids_by_pk[model_obj_id]
+                ]).delete()
+
+                # Model objects that other apps still registered are kept
+                registered_model_obj_ids = set(RegisteredForDeletionReceipt.objects.filter(
+                    model_obj_type_id=model_obj_type_id, model_obj_id__in=model_obj_ids_chunk
+                ).values_list('model_obj_id', flat=True))
+                model_obj_ids_chunk = [
+                    model_obj_id for model_obj_id in model_obj_ids_chunk if model_obj_id not in registered_model_obj_ids
+                ]
+                if model_class is not None and model_obj_ids_chunk:
+                    self.delete_model_objs(model_class, self.to_pks(model_obj_type_id, model_obj_ids_chunk))
+
+    def can_raw_delete(self, model_class):
+        """
+        Determines if the objects of a model class can be deleted with a raw delete, which skips the collection of
+        related objects. This is safe when the model has no delete signal receivers, no parents and no relations that
+        need to be cascaded or protected. The `raw_delete_models` of the loaded initial data classes force either
+        kind of delete.
+        :param model_class: The model class of the objects to delete
+        :type model_class: Model
+        :rtype: bool
+        """
+        for initial_data_class in self.initial_data_classes.values():
+            if initial_data_class is not None and model_class in initial_data_class.raw_delete_models:
+                return initial_data_class.raw_delete_models[model_class]
+
+        if model_class not in self.raw_deletable_models:
+            collector = Collector(using=router.db_for_write(model_class))
+            self.raw_deletable_models[model_class] = collector.can_fast_delete(model_class)
+
+        return self.raw_deletable_models[model_class]
+
+    def delete_model_objs(self, model_class, model_obj_ids):
+        """
+        Deletes the model objects of a model class with a single raw delete when that is safe and with a single
+        queryset delete otherwise. If the objects cannot be deleted together, such as when one of them is protected
+        or still referenced after a forced raw delete, every object is deleted on its own so that the objects that can
+        be deleted still are.
+        :param model_class: The model class of the objects to delete
+        :type model_class: Model
+        :param model_obj_ids: The ids of the model objects to delete. Ids of missing objects are ignored
+        :type model_obj_ids: list
+        """
+        queryset = model_class._base_manager.filter(pk__in=model_obj_ids)
+        with self.muted_signals.hide_receivers(model_class):
             try:
-                receipt.model_obj.delete()
+                with atomic():
+                    if self.can_raw_delete(model_class):
+                        queryset._raw_delete(queryset.db)
+                    else:
+                        queryset.delete()
+                    self.check_deferred_constraints(queryset.db)
+                self.muted_signals.record_deleted(model_class, model_obj_ids)
             except:  # noqa
-                # The model object may no longer be there, its ctype may be invalid, or it might be protected.
-                # Regardless, the model object cannot be deleted, so go ahead and delete its receipt.
-                pass
-            receipt.delete()
+                for model_obj in queryset:
+                    model_obj_id = model_obj.pk
+                    try:
+                        with atomic():
+                            model_obj.delete()
+                            self.check_deferred_constraints(queryset.db)
+                        self.muted_signals.record_deleted(model_class, [model_obj_id])
+                    except:  # noqa
+                        # The model object might be protected. Regardless, the model object cannot be deleted, so
+                        # go ahead and leave it in place.
+                        pass
+
+    def check_deferred_constraints(self, using):
+        """
+        Checks the foreign keys that postgres defers until the end of the transaction. A deleted object that is still
+        referenced, such as by a foreign key that does not cascade, would otherwise only fail at commit and roll back
+        the whole run instead of the savepoint it was deleted in.
+        :param using: The alias of the database the objects were deleted from
+        :type using: str
+        :raises IntegrityError: If a foreign key references a missing object
+        """
+        if connections[using].vendor == 'postgresql':
+            connections[using].check_constraints()
 
-    @atomic
     def update_all_apps(self):
         """
-        Loops through all app names contained in settings.INSTALLED_APPS and calls `update_app`
-        on each one. Handles any object deletions that happened after all apps have been initialized.
+        Plans the update of all app names contained in settings.INSTALLED_APPS and updates each one in order.
+        Handles any object deletions that happened after all apps have been initialized, including the deletions of
+        objects owned by apps that are no longer installed.
+        """
+        self.update_apps([app.name for app in apps.get_app_configs()], reconcile_all_apps=True)
+
+    def update_apps(self, app_names, reconcile_all_apps=False):
+        """
+        Updates the specified apps and their dependencies and handles the deletions of the objects they owned. Apps are
+        updated in parallel if more than one job is used, and are otherwise committed as often as configured.
+        :param app_names: The names of the apps to update. These should be the same paths as defined
+            in settings.INSTALLED_APPS
+        :type app_names: list
+        :param reconcile_all_apps: Whether the receipts of every app are reconciled instead of only the receipts of
+            the updated apps
+        :type reconcile_all_apps: bool
+        """
+        with self.muted_signals:
+            if self.jobs > 1:
+                self.update_apps_in_parallel(app_names, reconcile_all_apps)
+            elif self.commit == 'all':
+                self.update_apps_serially(app_names, reconcile_all_apps)
+            else:
+                self.update_apps_in_steps(app_names, reconcile_all_apps)
+
+    @atomic
+    def update_apps_serially(self, app_names, reconcile_all_apps=False):
+        """
+        Calls `update_app` on each of the specified apps in the order of the update plan in a single transaction.
+        Handles any object deletions after all apps have been initialized.
+        :param app_names: The names of the apps to update. These should be the same paths as defined
+            in settings.INSTALLED_APPS
+        :type app_names: list
+        :param reconcile_all_apps: Whether the receipts of every app are reconciled instead of only the receipts of
+            the updated apps
+        :type reconcile_all_apps: bool
         """
-        for app in apps.get_app_configs():
-            self.update_app(app.name)
+        for app in self.get_update_plan(app_names):
+            self.update_app(app)
 
         # During update_app, all apps added model objects that were registered for deletion.
         # Delete all objects that were previously managed by the initial data process
-        self.handle_deletions()
+        self.finish_update(reconcile_all_apps)
 
-    def get_dependency_call_list(self, app, call_list=None):
+    def update_apps_in_steps(self, app_names, reconcile_all_apps=False):
         """
-        Recursively detects any dependency cycles based on the specific app. A running list of
-        app calls is kept and passed to each function call. If a circular dependency is detected
-        an `InitialDataCircularDependency` exception will be raised. If a dependency does not exist,
-        an `InitialDataMissingApp` exception will be raised.
-        :param app: The name of the app in which to detect cycles. This should be the same path as defined
+        Updates the specified apps one after another and commits every app, or every level of apps that do not
+        depend on each other, in its own transaction. Apps that were committed stay updated when a later app fails
+        and are recorded with checkpoints. Deletions are handled in a final transaction.
+        :param app_names: The names of the apps to update. These should be the same paths as defined
             in settings.INSTALLED_APPS
+        :type app_names: list
+        :param reconcile_all_apps: Whether the receipts of every app are reconciled instead of only the receipts of
+            the updated apps
+        :type reconcile_all_apps: bool
+        """
+        if self.commit == 'level':
+            steps = self.get_update_levels(app_names)
+        else:
+            steps = [[app] for app in self.get_update_plan(app_names)]
+
+        if not self.resume:
+            self.clear_checkpoints()
+        for step in steps:
+            with atomic():
+                for app in step:
+                    if self.run_app(app):
+                        self.save_checkpoint(app, self.pks_registered_for_deletion[app])
+            self.muted_signals.commit()
+
+        self.finish_update(reconcile_all_apps)
+
+    def update_apps_in_parallel(self, app_names, reconcile_all_apps=False):
+        """
+        Updates the specified apps level by level, where the apps of a level are updated at the same time by a pool
+        of worker threads. Every app is updated in its own transaction on the database connection of its worker, so
+        apps that were updated stay updated when another app fails. The objects registered for deletion are merged
+        in plan order before deletions are handled in a final transaction.
+        :param app_names: The names of the apps to update. These should be the same paths as defined
+            in settings.INSTALLED_APPS
+        :type app_names: list
+        :param reconcile_all_apps: Whether the receipts of every app are reconciled instead of only the receipts of
+            the updated apps
+        :type reconcile_all_apps: bool
+        """
+        if not self.resume:
+            self.clear_checkpoints()
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            for level in self.get_update_levels(app_names):
+                level = [app for app in level if not self.skip_app(app)]
+                level_pks = executor.map(self.run_initial_data_in_transaction, level)
+                for app, pks_registered_for_deletion in zip(level, level_pks):
+                    self.pks_registered_for_deletion[app] = pks_registered_for_deletion
+                    self.updated_apps.add(app)
+
+        self.finish_update(reconcile_all_apps)
+
+    @atomic
+    def finish_update(self, reconcile_all_apps=False):
+        """
+        Handles the deletions of the updated apps and stores their fingerprints. Apps that were committed on their
+        own are finished in a final transaction. The checkpoints of the run are no longer needed once deletions are
+        handled.
+        :param reconcile_all_apps: Whether the receipts of every app are reconciled instead of only the receipts of
+            the updated apps
+        :type reconcile_all_apps: bool
+        """
+        self.handle_deletions(None if reconcile_all_apps else self.updated_apps)
+        self.save_fingerprints()
+        self.clear_checkpoints()
+
+    def save_checkpoint(self, app, pks_registered_for_deletion):
+        """
+        Records that an app was committed along with its fingerprint and the objects it registered for deletion,
+        which should happen in the transaction that commits the app.
+        :param app: The name of the committed app
         :type app: str
-        :param call_list: A running list of which apps will be updated in this branch of dependencies
-        :type call_list: list
+        :param pks_registered_for_deletion: The pks of the model objects that the app registered for deletion keyed
+            on content type id
+        :type pks_registered_for_deletion: dict
+        """
+        InitialDataCheckpoint.objects.update_or_create(app=app, defaults={
+            'commit_time': timezone.now(),
+            'fingerprint': self.fingerprints.get(app),
+            'pks_registered_for_deletion': {
+                str(model_obj_type_id): sorted(str(pk) for pk in pks)
+                for model_obj_type_id, pks in pks_registered_for_deletion.items()
+            },
+        })
+
+    def clear_checkpoints(self):
+        """
+        Removes the checkpoints of the apps committed by an earlier run.
+        """
+        InitialDataCheckpoint.objects.all().delete()
+
+    def is_up_to_date(self, app_names=None):
+        """
+        Determines if the last successful run left the specified apps and their dependencies up to date, which is the
+        case when the fingerprint stored for every app is the same as its current fingerprint.
+        :param app_names: The names of the apps to check. If None, every installed app is checked
+        :type app_names: list
+        :rtype: bool
         """
-        # start the call_list with the current app if one wasn't passed in recursively
-        call_list = call_list or [app]
+        if app_names is None:
+            app_names = [app.name for app in apps.get_app_configs()]
+
+        stored_fingerprints = dict(InitialDataFingerprint.objects.values_list('app', 'fingerprint'))
+        for app in self.get_update_plan(app_names):
+            self.fingerprints[app] = self.get_fingerprint(app)
+            if self.fingerprints[app] is None or stored_fingerprints.get(app) != self.fingerprints[app]:
+                return False
+
+        return True
+
+    def get_update_levels(self, app_names):
+        """
+        Splits the update plan into levels of apps that do not depend on each other. Every app is placed in the level
+        after the deepest level of its dependencies, so the apps of a level can be updated at the same time once all
+        previous levels have been updated.
+        :param app_names: The names of the apps to plan. These should be the same paths as defined
+            in settings.INSTALLED_APPS
+        :type app_names: list
+        :return: A list of the app names of every level
+        :rtype: list
+        """
+        levels = []
+        app_levels = {}
+        for app in self.get_update_plan(app_names):
+            app_levels[app] = max(
+                (app_levels[dependency] + 1 for dependency in self.dependency_graph[app] if dependency in app_levels),
+                default=0
+            )
+            if app_levels[app] == len(levels):
+                levels.append([])
+            levels[app_levels[app]].append(app)
 
-        # load the initial data class for the app
+        return levels
+
+    def get_dependency_call_list(self, app):
+        """
+        Returns the dependencies of an app that still need to be updated, in the order in which they will be
+        updated. If a circular dependency is detected an `InitialDataCircularDependency` exception will be raised.
+        If the app or a dependency does not exist, an `InitialDataMissingApp` exception will be raised.
+        :param app: The name of the app in which to get the dependencies. This should be the same path as defined
+            in settings.INSTALLED_APPS
+        :type app: str
+        :rtype: list
+        """
         try:
-            initial_data_class = self.load_app(app)
+            graph = self.get_dependency_graph([app])
         except ImportError:
             raise InitialDataMissingApp(dep=app)
+        if app not in graph:
+            raise InitialDataMissingApp(dep=app)
 
-        dependencies = initial_data_class.dependencies
-        # loop through each dependency and check recursively for cycles
-        for dep in dependencies:
-            if dep in call_list:
-                raise InitialDataCircularDependency(dep=dep, call_list=call_list)
-            else:
-                self.get_dependency_call_list(dep, call_list + [dep])
-        call_list.extend(dependencies)
-
-        return call_list[1:]
+        return [dependency for dependency in self.get_update_plan([app]) if dependency != app]
 
     def log(self, log):
         """
@@ -0,0 +1,110 @@
+import threading
+from collections import OrderedDict
+
+
+class InitialDataContext(object):
+    """
+    An identity map that is shared by every app of a run, so that apps can look up the model objects created by their
+    dependencies without querying for them again. Model objects are published keyed on their model class and a
+    natural key, such as a name or a tuple of fields. The map is bounded and evicts the model objects that were used
+    least recently once it is full.
+    Example:
+        # In the initial data of an app
+        self.context.publish(Group.objects.create(name='admins'), 'admins')
+
+        # In the initial data of an app that depends on it
+        admins = self.context.resolve(Group, 'admins', name='admins')
+    """
+    def __init__(self, max_size=None):
+        """
+        :param max_size: The maximum number of model objects that are kept
+        :type max_size: int
+        """
+        self.max_size = max_size or 100000
+        self.model_objs = OrderedDict()
+
+        # Apps updated in parallel share the context
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.model_objs)
+
+    def publish(self, model_obj, key, model_class=None):
+        """
+        Publishes a model object under a natural key.
+        :param model_obj: The model object to publish
+        :type model_obj: Model
+        :param key: The natural key of the model object
+        :type key: hashable
+        :param model_class: The model class to publish the model object under. Defaults to the class of the model object
+        :type model_class: Model
+        """
+        with self.lock:
+            cache_key = (model_class or type(model_obj), key)
+            self.model_objs[cache_key] = model_obj
+            self.model_objs.move_to_end(cache_key)
+            while len(self.model_objs) > self.max_size:
+                self.model_objs.popitem(last=False)
+
+    def publish_many(self, model_objs, key_field, model_class=None):
+        """
+        Publishes model objects under the values of one of their fields.
+        :param model_objs: The model objects to publish
+        :type model_objs: iterable
+        :param key_field: The name of the field whose value is the natural key of every model object
+        :type key_field: str
+        :param model_class: The model class to publish the model objects under. Defaults to the class of each model
+            object
+        :type model_class: Model
+        """
+        for model_obj in model_objs:
+            self.publish(model_obj, getattr(model_obj, key_field), model_class)
+
+    def get(self, model_class, key, default=None):
+        """
+        Returns the model object published under a natural key.
+        :param model_class: The model class the model object was published under
+        :type model_class: Model
+        :param key: The natural key of the model object
+        :type key: hashable
+        :param default: The value returned when no model object was published under the key
+        :rtype: Model
+        """
+        with self.lock:
+            cache_key = (model_class, key)
+            if cache_key not in self.model_objs:
+                return default
+
+            self.model_objs.move_to_end(cache_key)
+            return self.model_objs[cache_key]
+
+    def resolve(self, model_class, key, **lookup):
+        """
+        Returns the model object published under a natural key, fetching it with a lookup and publishing it when it
+        was not published.
+        :param model_class: The model class the model object was published under
+        :type model_class: Model
+        :param key: The natural key of the model object
+        :type key: hashable
+        :param lookup: The field lookups that fetch the model object
+        :rtype: Model
+        """
+        model_obj = self.get(model_class, key)
+        if model_obj is None:
+            model_obj = model_class._default_manager.get(**lookup)
+            self.publish(model_obj, key, model_class)
+
+        return model_obj
+
+    def invalidate(self, model_class=None):
+        """
+        Forgets the model objects published under a model class, or every model object if no model class is given.
+        :param model_class: The model class whose model objects are forgotten
+        :type model_class: Model
+        """
+        with self.lock:
+            if model_class is None:
+                self.model_objs.clear()
+            else:
+                for cache_key in [cache_key for cache_key in self.model_objs if cache_key[0] is model_class]:
+                    del self.model_objs[cache_key]
@@ -1,17 +1,23 @@
 
 class InitialDataCircularDependency(Exception):
     """
-    Raised when a circular dependency is detected.
+    Raised when a circular dependency is detected. Every dependency cycle that was found is reported. The
+    ``dep`` and ``call_list`` of versions before 3.0.0 are still accepted and reported as a single cycle.
     """
     def __init__(self, *args, **kwargs):
-        dep = kwargs.get('dep')
-        call_list = kwargs.get('call_list')
-        call_list += [dep]
-        call_lines = [
-            '{0}{1}'.format('--' * i, item)
-            for i, item in enumerate(call_list)
+        if 'cycles' in kwargs:
+            # Close every cycle with the app it starts with
+            self.cycles = [cycle + [cycle[0]] for cycle in kwargs.get('cycles')]
+        else:
+            self.cycles = [list(kwargs.get('call_list')) + [kwargs.get('dep')]]
+        cycle_strs = [
+            '\n'.join(
+                '{0}{1}'.format('--' * i, item)
+                for i, item in enumerate(cycle)
+            )
+            for cycle in self.cycles
         ]
-        error_str = 'Circular dependency found\n{0}'.format('\n'.join(call_lines))
+        error_str = 'Circular dependency found\n{0}'.format('\n\n'.join(cycle_strs))
         super(InitialDataCircularDependency, self).__init__(error_str)
 
 
@@ -0,0 +1,194 @@
+import json
+import os
+import re
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from django.db import connection
+
+
+# Matches the statements that write rows and captures the kind of write and the table written to
+WRITE_STATEMENT_PATTERN = re.compile(r'^\s*(INSERT\s+INTO|UPDATE|DELETE\s+FROM)\s+[`"\[]?([\w.]+)', re.IGNORECASE)
+
+# The rows written to the tables of this app, such as receipts and checkpoints, are not counted as changes
+BOOKKEEPING_TABLE_PREFIX = 'dynamic_initial_data_'
+
+
+class StepMetrics(object):
+    """
+    The metrics of a step of an initial data run, which is either the update of an app or the handling of deletions.
+    Times are in seconds and the memory peak is in bytes. The rows inserted, updated and deleted are counted from
+    the rows affected by every write statement, leaving out the tables of this app.
+    """
+    def __init__(self, step, app=None):
+        self.step = step
+        self.app = app
+        self.wall_time = 0.0
+        self.db_time = 0.0
+        self.query_count = 0
+        self.rows_registered = 0
+        self.memory_peak = 0
+        self.rows_inserted = 0
+        self.rows_updated = 0
+        self.rows_deleted = 0
+
+    def count_rows(self, sql, rowcount):
+        """
+        Counts the rows affected by a statement as inserted, updated or deleted rows.
+        :param sql: The statement that was executed
+        :type sql: str
+        :param rowcount: The number of rows the statement affected, which is negative when it is not known
+        :type rowcount: int
+        """
+        match = WRITE_STATEMENT_PATTERN.match(sql)
+        if match is None or rowcount < 0 or match.group(2).startswith(BOOKKEEPING_TABLE_PREFIX):
+            return
+
+        attribute = {'I': 'rows_inserted', 'U': 'rows_updated', 'D': 'rows_deleted'}[match.group(1)[0].upper()]
+        setattr(self, attribute, getattr(self, attribute) + rowcount)
+
+    def as_dict(self):
+        return {
+            'step': self.step,
+            'app': self.app,
+            'wall_time': self.wall_time,
+            'db_time': self.db_time,
+            'query_count': self.query_count,
+            'rows_registered': self.rows_registered,
+            'memory_peak': self.memory_peak,
+            'rows_inserted': self.rows_inserted,
+            'rows_updated': self.rows_updated,
+            'rows_deleted': self.rows_deleted,
+        }
+
+
+class RunReport(object):
+    """
+    Records the wall time, database time, query count, rows registered for deletion and memory peak of every step of
+    an initial data run. Queries are counted by wrapping the database connection of the thread running the step, so
+    steps running in parallel are measured separately. Memory is traced for the whole process, which makes memory
+    peaks of steps that run in parallel include each other. Nothing is measured unless the report is enabled.
+    """
+    # The metrics of a step that are exported to prometheus along with their help text
+    prometheus_metrics = [
+        ('wall_time', 'wall_seconds', 'Wall time of the step in seconds'),
+        ('db_time', 'db_seconds', 'Time spent executing queries in seconds'),
+        ('query_count', 'queries', 'Number of queries executed'),
+        ('rows_registered', 'rows_registered', 'Number of model objects registered for deletion'),
+        ('memory_peak', 'memory_peak_bytes', 'Peak memory traced while running the step in bytes'),
+        ('rows_inserted', 'rows_inserted', 'Number of rows inserted'),
+        ('rows_updated', 'rows_updated', 'Number of rows updated'),
+        ('rows_deleted', 'rows_deleted', 'Number of rows deleted'),
+    ]
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.steps = []
+
+        # Memory is only traced when the report is enabled since tracing slows down every allocation
+        self.started_tracing = enabled and not tracemalloc.is_tracing()
+        if self.started_tracing:
+            tracemalloc.start()
+
+    def stop(self):
+        """
+        Stops tracing memory if the report started it.
+        """
+        if self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
+
+    @contextmanager
+    def measure(self, step, app=None):
+        """
+        Measures the code run in the context as a step of the run. The metrics of the step are yielded so that the
+        rows registered for deletion can be filled in.
+        :param step: The name of the step, such as update_app or handle_deletions
+        :type step: str
+        :param app: The name of the app the step belongs to
+        :type app: str
+        :rtype: StepMetrics
+        """
+        metrics = StepMetrics(step, app)
+        if not self.enabled:
+            yield metrics
+            return
+
+        def count_query(execute, sql, params, many, context):
+            start_time = time.perf_counter()
+            try:
+                result = execute(sql, params, many, context)
+                metrics.count_rows(sql, context['cursor'].rowcount)
+                return result
+            finally:
+                metrics.db_time += time.perf_counter() - start_time
+                metrics.query_count += 1
+
+        # Peaks can only be reset since python 3.9. Before that the peak of a step is the peak of the run so far.
+        if hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+        start_memory = tracemalloc.get_traced_memory()[0]
+        start_time = time.perf_counter()
+        try:
+            with connection.execute_wrapper(count_query):
+                yield metrics
+        finally:
+            metrics.wall_time = time.perf_counter() - start_time
+            metrics.memory_peak = max(tracemalloc.get_traced_memory()[1] - start_memory, 0)
+            self.steps.append(metrics)
+
+    def as_json(self):
+        """
+        Formats the report as a JSON document with the metrics of every step in the order the steps finished.
+        :rtype: str
+        """
+        return json.dumps({'steps': [metrics.as_dict() for metrics in self.steps]}, indent=2)
+
+    def as_prometheus(self):
+        """
+        Formats the report in the prometheus text format so that it can be exported by the textfile collector of
+        the node exporter. Every step is labeled with its name and app.
+        :rtype: str
+        """
+        lines = []
+        for attribute, name, help_text in self.prometheus_metrics:
+            name = 'dynamic_initial_data_{0}'.format(name)
+            lines.append('# HELP {0} {1}'.format(name, help_text))
+            lines.append('# TYPE {0} gauge'.format(name))
+            lines.extend(
+                '{0}{{step="{1}",app="{2}"}} {3}'.format(
+                    name, metrics.step, metrics.app or '', getattr(metrics, attribute))
+                for metrics in self.steps
+            )
+        return '\n'.join(lines) + '\n'
+
+    def as_table(self):
+        """
+        Formats the rows changed by every step and the time it took as a table with a line per step.
+        :rtype: str
+        """
+        lines = ['{0:<40} {1:>10} {2:>10} {3:>10} {4:>10}'.format('app', 'inserted', 'updated', 'deleted', 'seconds')]
+        lines.extend(
+            '{0:<40} {1:>10} {2:>10} {3:>10} {4:>10.3f}'.format(
+                metrics.app or '({0})'.format(metrics.step), metrics.rows_inserted, metrics.rows_updated,
+                metrics.rows_deleted, metrics.wall_time)
+            for metrics in self.steps
+        )
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path, report_format='json'):
+        """
+        Writes the report to a file. The file is replaced at once so that collectors never read a partial report.
+        :param path: The path of the report file
+        :type path: str
+        :param report_format: Either json or prometheus
+        :type report_format: str
+        """
+        content = self.as_prometheus() if report_format == 'prometheus' else self.as_json()
+        file_descriptor, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)))
+        os.chmod(temp_path, 0o644)
+        with os.fdopen(file_descriptor, 'w') as report_file:
+            report_file.write(content)
+        os.replace(temp_path, path)
@@ -0,0 +1,43 @@
+import hashlib
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class AdvisoryLock(object):
+    """
+    A postgres session advisory lock that keeps concurrent runs of the initial data process, such as the release steps
+    of every node of a deploy, from updating the same database at the same time. The lock is held by the connection
+    that acquired it until it is released or the connection is closed, so it spans the transactions of a run.
+    """
+    def __init__(self, name='dynamic_initial_data', using=DEFAULT_DB_ALIAS):
+        """
+        :param name: The name of the lock. Runs only exclude each other when they use the same name
+        :type name: str
+        :param using: The alias of the database to lock
+        :type using: str
+        """
+        self.name = name
+        self.using = using
+
+        # Advisory locks are keyed on a signed 64 bit integer
+        self.key = int.from_bytes(hashlib.sha256(name.encode()).digest()[:8], 'big', signed=True)
+
+    def acquire(self, wait=True):
+        """
+        Acquires the lock.
+        :param wait: Whether to wait until the lock is released when another run holds it
+        :type wait: bool
+        :return: True if the lock was acquired
+        :rtype: bool
+        """
+        with connections[self.using].cursor() as cursor:
+            if wait:
+                cursor.execute('SELECT pg_advisory_lock(%s)', [self.key])
+                return True
+
+            cursor.execute('SELECT pg_try_advisory_lock(%s)', [self.key])
+            return cursor.fetchone()[0]
+
+    def release(self):
+        with connections[self.using].cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_unlock(%s)', [self.key])
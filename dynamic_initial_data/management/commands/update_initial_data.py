@@ -1,6 +1,9 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
 
 from dynamic_initial_data.base import InitialDataUpdater
+from dynamic_initial_data.locks import AdvisoryLock
+from dynamic_initial_data.tenants import TenantUpdater
 
 
 class Command(BaseCommand):
@@ -12,12 +15,163 @@ class Command(BaseCommand):
         parser.add_argument(
             '--app', dest='app', default=None, help='Updates a single app'
         )
+        parser.add_argument(
+            '--handle-deletions', action='store_true', dest='handle_deletions', default=False,
+            help='Deletes the objects no longer managed by the app and its dependencies when used with --app'
+        )
+        parser.add_argument(
+            '--incremental', action='store_true', dest='incremental', default=False,
+            help='Skips apps whose initial data and dependencies did not change since the last successful run'
+        )
+        parser.add_argument(
+            '--jobs', dest='jobs', type=int, default=1,
+            help='The number of apps that do not depend on each other to update in parallel'
+        )
+        parser.add_argument(
+            '--commit', dest='commit', choices=['all', 'level', 'app'], default='all',
+            help='Commits all apps together, every level of apps that do not depend on each other or every app'
+        )
+        parser.add_argument(
+            '--resume', action='store_true', dest='resume', default=False,
+            help='Skips the unchanged apps that an interrupted run committed before it failed'
+        )
+        parser.add_argument(
+            '--mute-signals', dest='mute_signals', nargs='+', default=None, metavar='MODEL',
+            help='Mutes the save and delete signals of models such as auth.User and sends a single '
+            'initial_data_changed signal for each of them after the run'
+        )
+        parser.add_argument(
+            '--report', dest='report', default=None,
+            help='Writes the timing, query count and memory of every app to a report file after the run'
+        )
+        parser.add_argument(
+            '--report-format', dest='report_format', choices=['json', 'prometheus'], default='json',
+            help='The format of the report file. Use prometheus to write a textfile for the node exporter'
+        )
+        parser.add_argument(
+            '--plan', '--dry-run', action='store_true', dest='plan', default=False,
+            help='Updates the apps in a transaction that is rolled back and prints the rows every app would insert, '
+            'update and delete along with the time it took. Signal receivers still run and cannot be muted'
+        )
+        parser.add_argument(
+            '--databases', dest='databases', nargs='+', default=None, metavar='DATABASE',
+            help='Updates every database alias, using --jobs as the number of databases updated at the same time'
+        )
+        parser.add_argument(
+            '--schemas', dest='schemas', nargs='+', default=None, metavar='SCHEMA',
+            help='Updates every postgres schema of the databases, using --jobs as the number of schemas updated at '
+            'the same time'
+        )
+        parser.add_argument(
+            '--receipts', dest='receipts', choices=['rows', 'groups'], default='rows',
+            help='Stores a receipt per object registered for deletion or, on postgres, a group of pks per app and '
+            'model. Every run has to use the same choice'
+        )
+        parser.add_argument(
+            '--lock', dest='lock', choices=['wait', 'skip'], default=None,
+            help='Takes a postgres advisory lock so that only one run updates the database at a time. When another '
+            'run holds the lock, either wait for it and skip if it left the initial data up to date, or skip at once'
+        )
+        parser.add_argument(
+            '--lock-name', dest='lock_name', default='dynamic_initial_data',
+            help='The name of the advisory lock. Only runs that use the same name exclude each other'
+        )
 
     help = 'Call the InitialData.update_initial_data command for all apps. Use --app to update only one app.'
 
     def handle(self, *args, **options):
-        updater = InitialDataUpdater(options)
-        if options['app']:
+        # Muted signals are sent for the changes of the run, which a plan rolls back
+        if options['plan'] and options['mute_signals']:
+            raise CommandError('--mute-signals cannot be used with --plan')
+
+        # Groups store their pks in postgres arrays
+        if options['receipts'] == 'groups' and any(
+            connections[alias].vendor != 'postgresql' for alias in options['databases'] or [DEFAULT_DB_ALIAS]
+        ):
+            raise CommandError('--receipts groups requires a postgres database')
+
+        if options['databases'] or options['schemas']:
+            return self.handle_tenants(options)
+        elif options['lock']:
+            return self.handle_with_lock(options)
+
+        self.handle_update(options)
+
+    def handle_update(self, options):
+        # Apps updated in parallel are committed by their own connections, so planned apps are updated one at a time
+        updater = InitialDataUpdater(dict(
+            options,
+            instrument=bool(options['report'] or options['plan']),
+            jobs=1 if options['plan'] else options['jobs'],
+        ))
+        try:
+            if options['plan']:
+                with transaction.atomic():
+                    self.update(updater, options)
+                    transaction.set_rollback(True)
+                self.stdout.write(updater.run_report.as_table(), ending='')
+            else:
+                self.update(updater, options)
+        finally:
+            # The report is also written when the run fails since it shows how far the run got
+            if options['report']:
+                updater.run_report.write(options['report'], options['report_format'])
+            updater.run_report.stop()
+
+    def update(self, updater, options):
+        if options['app'] and options['handle_deletions']:
+            updater.update_apps([options['app']])
+        elif options['app']:
             updater.update_app(options['app'])
         else:
             updater.update_all_apps()
+
+    def handle_with_lock(self, options):
+        """
+        Updates the apps while holding an advisory lock. When another run holds the lock, the update is either
+        skipped at once or skipped after waiting for the other run when that run left the apps up to date.
+        """
+        if connection.vendor != 'postgresql':
+            raise CommandError('--lock requires a postgres database')
+
+        lock = AdvisoryLock(options['lock_name'])
+        waited = not lock.acquire(wait=False)
+        if waited and options['lock'] == 'skip':
+            self.stdout.write('Skipping since another run holds the lock')
+            return
+        elif waited:
+            lock.acquire()
+
+        try:
+            if waited and InitialDataUpdater(options).is_up_to_date([options['app']] if options['app'] else None):
+                self.stdout.write('Skipping since another run updated the initial data while waiting for the lock')
+                return
+
+            self.handle_update(options)
+        finally:
+            lock.release()
+
+    def handle_tenants(self, options):
+        """
+        Updates every schema of every database and prints the result of each. Deletions are handled for every tenant
+        like they are for a single database, limited to the app and its dependencies when an app is given along with
+        --handle-deletions.
+        """
+        if options['plan'] or options['report'] or options['lock']:
+            raise CommandError('--plan, --report and --lock cannot be used with --databases or --schemas')
+
+        try:
+            tenant_updater = TenantUpdater(options)
+        except ValueError as error:
+            raise CommandError(str(error))
+
+        results = tenant_updater.update_tenants(
+            TenantUpdater.get_tenants(options['databases'], options['schemas']),
+            [options['app']] if options['app'] else None,
+            handle_deletions=options['handle_deletions'])
+        for result in results:
+            self.stdout.write(str(result))
+
+        failed_count = len([result for result in results if not result.succeeded])
+        if failed_count:
+            raise CommandError('{0} of {1} tenants failed'.format(failed_count, len(results)))
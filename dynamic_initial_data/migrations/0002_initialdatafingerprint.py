@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+
+from django.db import models, migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dynamic_initial_data', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='registeredfordeletionreceipt',
+            name='app',
+            field=models.CharField(max_length=256, blank=True, default=''),
+        ),
+        migrations.CreateModel(
+            name='InitialDataFingerprint',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', primary_key=True, serialize=False, auto_created=True)),
+                ('app', models.CharField(max_length=256, unique=True)),
+                ('fingerprint', models.CharField(max_length=64)),
+                ('update_time', models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+
+from django.db import models, migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dynamic_initial_data', '0002_initialdatafingerprint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InitialDataRun',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', primary_key=True, serialize=False, auto_created=True)),
+                ('start_time', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='registeredfordeletionreceipt',
+            name='generation',
+            field=models.PositiveIntegerField(default=0, db_index=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+
+from django.db import models, migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dynamic_initial_data', '0003_initialdatarun'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='registeredfordeletionreceipt',
+            index=models.Index(fields=['app', 'generation'], name='receipt_app_generation_idx'),
+        ),
+    ]
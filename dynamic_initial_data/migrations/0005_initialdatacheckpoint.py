@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+
+from django.db import models, migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dynamic_initial_data', '0004_receipt_app_generation_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InitialDataCheckpoint',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', primary_key=True, serialize=False, auto_created=True)),
+                ('app', models.CharField(max_length=256, unique=True)),
+                ('commit_time', models.DateTimeField()),
+            ],
+        ),
+    ]
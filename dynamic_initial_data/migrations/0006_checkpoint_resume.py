@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+
+from django.db import models, migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dynamic_initial_data', '0005_initialdatacheckpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='initialdatacheckpoint',
+            name='fingerprint',
+            field=models.CharField(max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='initialdatacheckpoint',
+            name='pks_registered_for_deletion',
+            field=models.JSONField(default=dict),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+
+from django.db import models, migrations
+import django.contrib.postgres.fields
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0001_initial'),
+        ('dynamic_initial_data', '0006_checkpoint_resume'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegisteredForDeletionGroup',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', primary_key=True, serialize=False, auto_created=True)),
+                ('app', models.CharField(max_length=256)),
+                ('model_obj_type', models.ForeignKey(
+                    on_delete=django.db.models.deletion.CASCADE, to='contenttypes.ContentType')),
+                ('model_obj_ids', django.contrib.postgres.fields.ArrayField(
+                    base_field=models.BigIntegerField(), size=None)),
+                ('register_time', models.DateTimeField()),
+                ('generation', models.PositiveIntegerField(db_index=True)),
+            ],
+            options={
+                'unique_together': {('app', 'model_obj_type', 'generation')},
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+
+from django.db import models, migrations
+import django.contrib.postgres.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dynamic_initial_data', '0007_registeredfordeletiongroup'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='registeredfordeletionreceipt',
+            name='model_obj_id',
+            field=models.CharField(max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='registeredfordeletiongroup',
+            name='model_obj_ids',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=255), size=None),
+        ),
+    ]
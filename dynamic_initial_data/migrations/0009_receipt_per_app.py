@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dynamic_initial_data', '0008_receipt_text_pks'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='registeredfordeletionreceipt',
+            unique_together=set([('model_obj_type', 'model_obj_id', 'app')]),
+        ),
+    ]
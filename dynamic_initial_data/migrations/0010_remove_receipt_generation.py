@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+
+from django.db import models, migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dynamic_initial_data', '0009_receipt_per_app'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='registeredfordeletionreceipt',
+            name='receipt_app_generation_idx',
+        ),
+        migrations.RemoveField(
+            model_name='registeredfordeletionreceipt',
+            name='generation',
+        ),
+        migrations.AddIndex(
+            model_name='registeredfordeletionreceipt',
+            index=models.Index(fields=['app'], name='receipt_app_idx'),
+        ),
+    ]
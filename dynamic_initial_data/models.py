@@ -1,5 +1,6 @@
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.fields import ArrayField
 from django.db import models
 from manager_utils import ManagerUtilsManager
 
@@ -9,16 +10,95 @@ class RegisteredForDeletionReceipt(models.Model):
     Specifies a receipt of a model object that was registered for deletion by the dynamic
     initial data process.
     """
-    # The model object that was registered
+    # The model object that was registered. The pk is stored as text so that models with any type of pk can be
+    # registered, and it is converted back with the pk field of the model of the content type.
     model_obj_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
-    model_obj_id = models.PositiveIntegerField()
+    model_obj_id = models.CharField(max_length=255)
     model_obj = GenericForeignKey('model_obj_type', 'model_obj_id', for_concrete_model=False)
 
-    # The time at which it was registered for deletion
+    # The time at which it was first registered for deletion by the app. Receipts are not rewritten by later runs
+    # that register the model object again, and receipts of model objects that were not registered again are stale.
     register_time = models.DateTimeField()
 
+    # The app that registered the model object for deletion. Every app that registers a model object has its own
+    # receipt, and the model object is only deleted once no app has a receipt for it.
+    app = models.CharField(max_length=256, blank=True, default='')
+
     # Use manager utils for bulk updating capabilities
     objects = ManagerUtilsManager()
 
     class Meta:
-        unique_together = ('model_obj_type', 'model_obj_id')
+        unique_together = ('model_obj_type', 'model_obj_id', 'app')
+        indexes = [
+            models.Index(fields=['app'], name='receipt_app_idx'),
+        ]
+
+
+class RegisteredForDeletionGroup(models.Model):
+    """
+    Specifies the model objects of one type that were registered for deletion by an app, stored as a single row with
+    an array of their pks instead of a receipt per model object. Groups are used instead of receipts by the grouped
+    receipt backend, which requires postgres. Large arrays are compressed by postgres when they are stored.
+    """
+    # The app that registered the model objects for deletion
+    app = models.CharField(max_length=256)
+
+    # The type and the pks of the model objects that were registered. Pks are stored as text like the pks of receipts.
+    model_obj_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    model_obj_ids = ArrayField(models.CharField(max_length=255))
+
+    # The time at which the model objects were registered for deletion
+    register_time = models.DateTimeField()
+
+    # The generation of the run that registered the model objects. Every run adds the groups of the apps it updated
+    # and removes the groups of earlier generations that they replace.
+    generation = models.PositiveIntegerField(db_index=True)
+
+    class Meta:
+        unique_together = ('app', 'model_obj_type', 'generation')
+
+
+class InitialDataRun(models.Model):
+    """
+    Specifies a run of the dynamic initial data process that handled deletions with groups. The id of the run is
+    the generation of the groups that were registered by the run. Only the latest run is kept.
+    """
+    # The time at which deletions started being handled
+    start_time = models.DateTimeField()
+
+
+class InitialDataFingerprint(models.Model):
+    """
+    Specifies the fingerprint of the initial data of an app as of the last successful run of the dynamic
+    initial data process.
+    """
+    # The name of the app as defined in settings.INSTALLED_APPS
+    app = models.CharField(max_length=256, unique=True)
+
+    # A hash of the initial data module, dependencies and fingerprints of the dependencies of the app
+    fingerprint = models.CharField(max_length=64)
+
+    # The time at which the fingerprint was stored
+    update_time = models.DateTimeField()
+
+    # Use manager utils for bulk updating capabilities
+    objects = ManagerUtilsManager()
+
+
+class InitialDataCheckpoint(models.Model):
+    """
+    Specifies an app that was committed by a run of the dynamic initial data process that commits apps before
+    handling deletions. Checkpoints are removed once the run handled deletions, so the checkpoints that remain show
+    how far an interrupted run got and allow the run to be resumed.
+    """
+    # The name of the app as defined in settings.INSTALLED_APPS
+    app = models.CharField(max_length=256, unique=True)
+
+    # The time at which the app was committed
+    commit_time = models.DateTimeField()
+
+    # The fingerprint of the app when it was committed. The app is only skipped by a resumed run if it did not change.
+    fingerprint = models.CharField(max_length=64, null=True)
+
+    # The pks of the model objects that the app registered for deletion as text keyed on content type id
+    pks_registered_for_deletion = models.JSONField(default=dict)
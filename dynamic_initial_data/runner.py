@@ -0,0 +1,53 @@
+from django.apps import apps
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.signals import post_migrate
+from django.test.runner import DiscoverRunner
+
+from dynamic_initial_data.base import InitialDataUpdater
+
+
+class InitialDataTestRunnerMixin(object):
+    """
+    A mixin for test runners that updates the initial data of all apps once per test session, as soon as the test
+    database is migrated, instead of in the setup of every test case. Test cases see the initial data and their changes
+    to it are rolled back along with the rest of each test. The initial data is loaded before the test database is
+    serialized and cloned, so serialized rollbacks restore it and every database cloned for parallel tests, which are
+    postgres template databases on postgres, has it as well.
+
+    The initial data is updated incrementally, so when the test database is kept with --keepdb only the apps whose
+    initial data modules changed since the last session are updated again.
+    Example:
+        TEST_RUNNER = 'dynamic_initial_data.runner.InitialDataTestRunner'
+    """
+    def setup_databases(self, **kwargs):
+        self.initial_data_loaded = False
+        post_migrate.connect(self.load_initial_data, dispatch_uid='dynamic_initial_data.runner')
+        try:
+            return super(InitialDataTestRunnerMixin, self).setup_databases(**kwargs)
+        finally:
+            post_migrate.disconnect(dispatch_uid='dynamic_initial_data.runner')
+
+    def load_initial_data(self, sender=None, using=DEFAULT_DB_ALIAS, **kwargs):
+        """
+        Updates the initial data of all apps once the default test database is migrated. Migrations send a
+        post_migrate signal for every app with models in the order of the installed apps, and the content types and
+        permissions of every app are created by receivers of its own signal. Initial data is therefore only loaded on
+        the signal of the last app, when the content types and permissions of every app exist.
+        :param sender: The config of the app the signal is sent for
+        :type sender: AppConfig
+        :param using: The alias of the migrated database
+        :type using: str
+        """
+        app_configs = [app_config for app_config in apps.get_app_configs() if app_config.models_module is not None]
+        if using != DEFAULT_DB_ALIAS or self.initial_data_loaded or sender != app_configs[-1]:
+            return
+
+        self.initial_data_loaded = True
+        InitialDataUpdater({'incremental': True, 'verbose': self.verbosity > 1}).update_all_apps()
+
+
+class InitialDataTestRunner(InitialDataTestRunnerMixin, DiscoverRunner):
+    """
+    The default django test runner, loading initial data once per test session.
+    """
+    pass
@@ -0,0 +1,172 @@
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import Signal
+
+
+# Sent once per model at the end of a run that muted the signals of the model. The sender is the model class and the
+# pks of the model objects that were saved and deleted during the run are sent as the saved_pks and deleted_pks sets.
+initial_data_changed = Signal()
+
+
+class MutedSignals(object):
+    """
+    Mutes the save and delete signals of a set of models while initial data is updated and records the pks of the
+    model objects the signals were sent for. Once the outermost use of the context exits, a single
+    `initial_data_changed` signal is sent for every model that changed, so that receivers can act on every changed
+    model object at once. The pks are recorded separately by every thread until `commit` is called after the
+    transaction that changed them commits. When the context exits with an error, only the committed changes are
+    sent.
+    """
+    muted_signals = [pre_save, post_save, pre_delete, post_delete]
+
+    def __init__(self, models=None):
+        """
+        :param models: The model classes or labels, such as auth.User, of the models whose signals are muted
+        :type models: list
+        """
+        self.models = {apps.get_model(model) if isinstance(model, str) else model for model in models or []}
+        self.depth = 0
+        self.hidden_model = None
+
+        # The pks of the committed changes and the pks recorded by every thread that were not committed yet
+        self.saved_pks = defaultdict(set)
+        self.deleted_pks = defaultdict(set)
+        self.pending = threading.local()
+        self.lock = threading.Lock()
+
+    def is_muted(self, sender):
+        """
+        Determines if the signals of a model are muted. Proxy models are muted along with their concrete models.
+        :rtype: bool
+        """
+        return sender in self.models or getattr(getattr(sender, '_meta', None), 'concrete_model', None) in self.models
+
+    def get_pending(self):
+        """
+        Returns the pks of the changes the current thread recorded since it last committed or rolled back.
+        """
+        if not hasattr(self.pending, 'saved_pks'):
+            self.pending.saved_pks = defaultdict(set)
+            self.pending.deleted_pks = defaultdict(set)
+        return self.pending
+
+    def record_saved(self, model_class, pks):
+        if self.depth and self.is_muted(model_class):
+            self.get_pending().saved_pks[model_class].update(pks)
+
+    def record_deleted(self, model_class, pks):
+        if self.depth and self.is_muted(model_class):
+            self.get_pending().deleted_pks[model_class].update(pks)
+
+    def commit(self):
+        """
+        Marks the changes recorded by the current thread as committed, which should happen once the transaction that
+        made them commits. Committed changes are sent even when the context exits with an error.
+        """
+        pending = self.get_pending()
+        with self.lock:
+            for model_class, pks in pending.saved_pks.items():
+                self.saved_pks[model_class].update(pks)
+            for model_class, pks in pending.deleted_pks.items():
+                self.deleted_pks[model_class].update(pks)
+        self.rollback()
+
+    def rollback(self):
+        """
+        Forgets the changes recorded by the current thread that were not committed.
+        """
+        self.get_pending().saved_pks.clear()
+        self.get_pending().deleted_pks.clear()
+
+    def mute(self, signal):
+        """
+        Replaces the send and has_listeners methods of a signal with methods that skip the muted models.
+        """
+        send = signal.send
+        has_listeners = signal.has_listeners
+
+        def send_unless_muted(sender, **named):
+            if not self.is_muted(sender):
+                return send(sender, **named)
+
+            if signal is post_save:
+                self.record_saved(sender, [named['instance'].pk])
+            elif signal is post_delete:
+                self.record_deleted(sender, [named['instance'].pk])
+            return []
+
+        def has_listeners_unless_muted(sender=None):
+            # Muted models count as having receivers so that their objects are collected and recorded when they are
+            # deleted by a cascade, except for the model whose receivers are hidden
+            if self.is_muted(sender):
+                return not self.is_hidden(sender)
+            return has_listeners(sender)
+
+        signal.send = send_unless_muted
+        signal.has_listeners = has_listeners_unless_muted
+
+    def is_hidden(self, sender):
+        """
+        Determines if the receivers of a model are hidden. Proxy models are hidden along with their concrete models.
+        :rtype: bool
+        """
+        concrete_model = getattr(getattr(sender, '_meta', None), 'concrete_model', sender)
+        return self.hidden_model is not None and concrete_model is self.hidden_model._meta.concrete_model
+
+    @contextmanager
+    def hide_receivers(self, model_class):
+        """
+        Makes a muted model count as having no signal receivers, which allows its objects to be deleted without
+        collecting them one by one. Deletions that skip collection do not send signals, so the pks of the deleted
+        model objects have to be recorded with `record_deleted`. The muted models reached through a cascade are
+        still collected, so that their deleted objects are recorded.
+        :param model_class: The model class whose objects are deleted
+        :type model_class: Model
+        """
+        self.hidden_model = model_class
+        try:
+            yield
+        finally:
+            self.hidden_model = None
+
+    def send_changes(self):
+        """
+        Sends the `initial_data_changed` signal for every model that changed and forgets the changes.
+        """
+        for model_class in list(self.saved_pks) + [model for model in self.deleted_pks if model not in self.saved_pks]:
+            initial_data_changed.send(
+                sender=model_class,
+                saved_pks=self.saved_pks.get(model_class, set()),
+                deleted_pks=self.deleted_pks.get(model_class, set()),
+            )
+
+        self.saved_pks.clear()
+        self.deleted_pks.clear()
+
+    def __enter__(self):
+        self.depth += 1
+        if self.depth == 1 and self.models:
+            for signal in self.muted_signals:
+                self.mute(signal)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.depth -= 1
+        if self.depth or not self.models:
+            return
+
+        # Restore the methods of the signals by removing the replacements from the signal instances
+        for signal in self.muted_signals:
+            del signal.send
+            del signal.has_listeners
+
+        # The changes that were not committed when the context exits with an error were rolled back
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+        self.send_changes()
@@ -0,0 +1,198 @@
+import copy
+import threading
+import time
+from collections import UserDict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.utils import load_backend
+
+from dynamic_initial_data.base import InitialDataUpdater
+
+
+class TenantResult(object):
+    """
+    The outcome of updating the initial data of a tenant, which is a database alias and optionally a postgres schema
+    of that database. Times are in seconds.
+    """
+    def __init__(self, database, schema=None):
+        self.database = database
+        self.schema = schema
+        self.wall_time = 0.0
+        self.error = None
+
+    @property
+    def succeeded(self):
+        return self.error is None
+
+    def __str__(self):
+        return '{0}{1}: {2} in {3:.3f}s{4}'.format(
+            self.database,
+            '.{0}'.format(self.schema) if self.schema else '',
+            'updated' if self.succeeded else 'failed',
+            self.wall_time,
+            ' ({0!r})'.format(self.error) if self.error else '',
+        )
+
+
+class ThreadLocalDict(UserDict):
+    """
+    A dict whose items are kept separately for every thread.
+    """
+    def __init__(self):
+        self.local = threading.local()
+        super(ThreadLocalDict, self).__init__()
+
+    @property
+    def data(self):
+        if not hasattr(self.local, 'data'):
+            self.local.data = {}
+        return self.local.data
+
+    @data.setter
+    def data(self, data):
+        self.local.data = data
+
+
+class TenantUpdater(object):
+    """
+    Updates the initial data of many tenants with a single import and plan of the initial data classes. Tenants are
+    updated at the same time by a bounded pool of worker threads. Every worker binds the default database connection
+    of its thread to the database and schema of its tenant, so initial data classes, the updater and the bulk
+    operations they use all write to the tenant without having to know about it. A tenant that fails does not stop
+    the other tenants from being updated.
+    Example:
+        results = TenantUpdater({'jobs': 4}).update_tenants(TenantUpdater.get_tenants(['default'], ['acme', 'globex']))
+    """
+    def __init__(self, options=None):
+        """
+        :param options: The options of the updater of every tenant. The jobs option is the number of tenants that are
+            updated at the same time, while the apps of every tenant are updated one after another
+        :type options: dict
+        """
+        self.options = options or {}
+        self.jobs = self.options.get('jobs', None) or 1
+
+        # Signals are muted by replacing the methods of the signals for the whole process, which tenants updated at
+        # the same time would undo for each other
+        if self.options.get('mute_signals', None) and self.jobs > 1:
+            raise ValueError('Signals cannot be muted while tenants are updated at the same time')
+
+        # Plans the update once so that every tenant reuses the loaded initial data classes and dependency graph
+        self.planner = InitialDataUpdater(dict(self.options, jobs=1))
+
+    @staticmethod
+    def get_tenants(databases=None, schemas=None):
+        """
+        Builds a tenant for every schema of every database.
+        :param databases: The database aliases to update. Defaults to the default database
+        :type databases: list
+        :param schemas: The postgres schemas to update in every database. Defaults to the schemas in the search path
+            of every database
+        :type schemas: list
+        :return: A list of database alias and schema tuples
+        :rtype: list
+        """
+        return [
+            (database, schema)
+            for database in databases or [DEFAULT_DB_ALIAS]
+            for schema in schemas or [None]
+        ]
+
+    def connect(self, database, schema=None):
+        """
+        Creates a connection to a database that uses the default alias. The schema, if any, becomes the search path of
+        the connection and stays that way when the connection reconnects. The schema is quoted as an identifier and
+        escaped for the libpq options string, so schema names with capitals, spaces or quotes are used as they are.
+        :param database: The alias of the database
+        :type database: str
+        :param schema: The postgres schema to use
+        :type schema: str
+        :rtype: BaseDatabaseWrapper
+        """
+        settings_dict = copy.deepcopy(connections.settings[database])
+        if schema:
+            search_path = '"{0}"'.format(schema.replace('"', '""')).replace('\\', '\\\\').replace(' ', '\\ ')
+            options = settings_dict.setdefault('OPTIONS', {})
+            options['options'] = ' '.join(filter(None, [
+                options.get('options'), '-c search_path={0}'.format(search_path)
+            ]))
+
+        return load_backend(settings_dict['ENGINE']).DatabaseWrapper(settings_dict, DEFAULT_DB_ALIAS)
+
+    def update_tenants(self, tenants, app_names=None, handle_deletions=True):
+        """
+        Updates the initial data of every tenant.
+        :param tenants: The database alias and schema tuples of the tenants
+        :type tenants: list
+        :param app_names: The names of the apps to update along with their dependencies. If None, every installed app
+            is updated and all deletions are handled
+        :type app_names: list
+        :param handle_deletions: Whether the deletions of the given apps are handled. It is ignored when every app is
+            updated
+        :type handle_deletions: bool
+        :return: The result of every tenant in the order of the tenants
+        :rtype: list of TenantResult
+        """
+        reconcile_all_apps = app_names is None
+        if reconcile_all_apps:
+            app_names = [app.name for app in apps.get_app_configs()]
+
+        # Raise loading errors and dependency cycles once instead of for every tenant
+        self.planner.get_update_plan(app_names)
+
+        # Content types are cached on the alias of their database, which is the default alias for every tenant, while
+        # the content type ids of tenants can differ. Every worker keeps its own cache while tenants are updated.
+        content_type_cache = ContentType.objects._cache
+        ContentType.objects._cache = ThreadLocalDict()
+        try:
+            with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+                return list(executor.map(
+                    lambda tenant: self.update_tenant(
+                        tenant[0], tenant[1], app_names, reconcile_all_apps, reconcile_all_apps or handle_deletions),
+                    tenants))
+        finally:
+            ContentType.objects._cache = content_type_cache
+
+    def update_tenant(self, database, schema, app_names, reconcile_all_apps=False, handle_deletions=True):
+        """
+        Updates the initial data of a tenant on the default connection of the current thread, which is bound to the
+        tenant for the duration of the update.
+        :param database: The alias of the database of the tenant
+        :type database: str
+        :param schema: The postgres schema of the tenant
+        :type schema: str
+        :param app_names: The names of the apps to update
+        :type app_names: list
+        :param reconcile_all_apps: Whether the receipts of every app are reconciled
+        :type reconcile_all_apps: bool
+        :param handle_deletions: Whether deletions are handled after the apps are updated
+        :type handle_deletions: bool
+        :rtype: TenantResult
+        """
+        result = TenantResult(database, schema)
+        start_time = time.perf_counter()
+        try:
+            connections[DEFAULT_DB_ALIAS] = self.connect(database, schema)
+            ContentType.objects.clear_cache()
+            updater = InitialDataUpdater(dict(self.options, jobs=1))
+            updater.initial_data_classes = dict(self.planner.initial_data_classes)
+            updater.dependency_graph = dict(self.planner.dependency_graph)
+            if handle_deletions:
+                updater.update_apps(app_names, reconcile_all_apps)
+            else:
+                for app in app_names:
+                    updater.update_app(app)
+        except Exception as error:
+            result.error = error
+        finally:
+            # Worker threads are reused, so the default connection of the thread is unbound from the tenant
+            connections[DEFAULT_DB_ALIAS].close()
+            del connections[DEFAULT_DB_ALIAS]
+            ContentType.objects.clear_cache()
+            result.wall_time = time.perf_counter() - start_time
+
+        self.planner.log(str(result))
+        return result
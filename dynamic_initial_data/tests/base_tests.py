@@ -1,18 +1,52 @@
+import sys
+import uuid
 from datetime import datetime
 
 from django.contrib.contenttypes.models import ContentType
 from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete
 from django.test import TestCase, TransactionTestCase
 from django.test.utils import override_settings
 from django_dynamic_fixture import G
 from freezegun import freeze_time
 from unittest.mock import patch
 
-from dynamic_initial_data.base import BaseInitialData, InitialDataUpdater
+from dynamic_initial_data.base import BaseInitialData, InitialDataUpdater, initial_data_class_registry
 from dynamic_initial_data.exceptions import InitialDataMissingApp, InitialDataCircularDependency
-from dynamic_initial_data.models import RegisteredForDeletionReceipt
+from dynamic_initial_data.models import (
+    InitialDataCheckpoint, InitialDataFingerprint, InitialDataRun, RegisteredForDeletionGroup,
+    RegisteredForDeletionReceipt
+)
 from dynamic_initial_data.tests.mocks import MockInitialData, MockClass, MockOne, MockTwo, MockThree
-from dynamic_initial_data.tests.models import Account, ProxyAccount, CantCascadeModel, RelModel
+from dynamic_initial_data.tests.models import (
+    Account, ProxyAccount, CantCascadeModel, CharPkModel, Country, Currency, RelModel, UUIDModel
+)
+
+
+def register_for_deletion(initial_data_updater, *model_objs):
+    """
+    Registers model objects for deletion with an updater as if a single app registered them.
+    """
+    initial_data_updater.pks_registered_for_deletion = {'app': initial_data_updater.get_pks_by_content_type(model_objs)}
+
+
+def patch_graph(graph, **attrs):
+    """
+    Patches the loading of apps so that every app in the graph has an initial data class with its dependencies and
+    any other provided class attributes.
+    """
+    initial_data_classes = {
+        app: type(str(app), (MockInitialData,), dict(attrs, dependencies=dependencies))
+        for app, dependencies in graph.items()
+    }
+
+    def app_loader(app):
+        if app not in initial_data_classes:
+            raise ImportError('No module named {0}'.format(app))
+        return initial_data_classes[app]
+
+    return patch.object(InitialDataUpdater, 'load_app', side_effect=app_loader, spec_set=True)
 
 
 class BaseInitialDataTest(TestCase):
@@ -43,6 +77,242 @@ class BaseInitialDataTest(TestCase):
         initial_data.register_for_deletion(account1, account2)
         self.assertEqual(initial_data.get_model_objs_registered_for_deletion(), [account1, account2])
 
+    def test_register_pks_for_deletion(self):
+        """
+        Tests registering pks for deletion without model objects.
+        """
+        initial_data = BaseInitialData()
+        initial_data.register_pks_for_deletion(Account, [1, 2])
+        initial_data.register_pks_for_deletion(Account, [2, 3])
+        initial_data.register_pks_for_deletion(ProxyAccount, [1])
+        self.assertEqual(initial_data.get_pks_registered_for_deletion(), {Account: {1, 2, 3}, ProxyAccount: {1}})
+
+    def test_register_queryset_for_deletion(self):
+        """
+        Tests registering every model object of a queryset for deletion.
+        """
+        initial_data = BaseInitialData()
+        account1 = G(Account, name='hi')
+        account2 = G(Account, name='hi')
+        G(Account, name='hi2')
+        initial_data.register_queryset_for_deletion(ProxyAccount.objects.filter(name='hi'))
+        self.assertEqual(initial_data.get_pks_registered_for_deletion(), {ProxyAccount: {account1.id, account2.id}})
+
+    def test_sync(self):
+        """
+        Tests that syncing inserts missing rows, updates only the changed rows and registers every synced pk.
+        """
+        united_states = G(Country, code='US', name='United States', population=1)
+        canada = G(Country, code='CA', name='Canada', population=2)
+        mexico = G(Country, code='MX', name='Mexico', population=3)
+        initial_data = BaseInitialData()
+
+        # The existing model objects are fetched in one query, inserted in one and updated in one
+        with self.assertNumQueries(3):
+            pks = initial_data.sync(Country, [
+                {'code': 'US', 'name': 'United States of America'},
+                {'code': 'CA', 'name': 'Canada'},
+                {'code': 'FR', 'name': 'France'},
+            ], ['code'])
+
+        france = Country.objects.get(code='FR')
+        self.assertEqual(pks, {'US': united_states.id, 'CA': canada.id, 'FR': france.id})
+        self.assertEqual(Country.objects.get(id=united_states.id).name, 'United States of America')
+        self.assertEqual(Country.objects.get(id=united_states.id).population, 1)
+        self.assertTrue(Country.objects.filter(id=mexico.id).exists())
+        self.assertEqual(
+            initial_data.get_pks_registered_for_deletion(), {Country: {united_states.id, canada.id, france.id}})
+
+    def test_sync_unchanged(self):
+        """
+        Tests that syncing unchanged rows only fetches the existing model objects.
+        """
+        country = G(Country, code='US', name='United States', population=1)
+
+        with self.assertNumQueries(1):
+            pks = BaseInitialData().sync(Country, [{'code': 'US', 'name': 'United States', 'population': 1}], ['code'])
+
+        self.assertEqual(pks, {'US': country.id})
+
+    def test_sync_converts_values(self):
+        """
+        Tests that row values are converted to the types of their fields before they are matched and compared, so that
+        syncing the same rows again neither creates nor updates model objects.
+        """
+        rows = [{'id': '5', 'name': 'Account'}]
+        self.assertEqual(BaseInitialData().sync(Account, rows, ['id']), {5: 5})
+
+        with self.assertNumQueries(1):
+            self.assertEqual(BaseInitialData().sync(Account, rows, ['id']), {5: 5})
+
+        country = G(Country, code='US', name='United States', population=1)
+        with self.assertNumQueries(1):
+            BaseInitialData().sync(Country, [{'code': 'US', 'name': 'United States', 'population': '1'}], ['code'])
+
+        self.assertEqual(list(Account.objects.values_list('id', flat=True)), [5])
+        self.assertEqual(Country.objects.get().id, country.id)
+
+    def test_sync_multiple_unique_fields(self):
+        """
+        Tests syncing rows that are identified by more than one field.
+        """
+        country = G(Country, code='US', name='United States', population=1)
+        G(Country, code='CA', name='United States', population=1)
+
+        pks = BaseInitialData().sync(Country, [{'code': 'US', 'name': 'United States', 'population': 2}], [
+            'code', 'name'
+        ], update_fields=['population'])
+
+        self.assertEqual(pks, {('US', 'United States'): country.id})
+        self.assertEqual(Country.objects.get(id=country.id).population, 2)
+        self.assertEqual(Country.objects.get(code='CA').population, 1)
+
+
+class StreamingInitialDataTest(TestCase):
+    """
+    Tests initial data classes whose update_initial_data is a generator.
+    """
+    def test_flush(self):
+        """
+        Tests that flushing saves the unsaved model objects with one query and only keeps the pks of the flushed and
+        registered model objects.
+        """
+        saved_account = G(Account)
+        registered_account = G(Account)
+        initial_data = BaseInitialData()
+        initial_data.register_for_deletion(registered_account)
+
+        with self.assertNumQueries(1):
+            initial_data.flush([saved_account, Account(name='first'), Account(name='second')])
+
+        new_account_ids = set(Account.objects.filter(name__in=['first', 'second']).values_list('id', flat=True))
+        self.assertEqual(initial_data.get_model_objs_registered_for_deletion(), [])
+        self.assertEqual(initial_data.get_pks_registered_for_deletion(), {
+            Account: {saved_account.id, registered_account.id} | new_account_ids
+        })
+
+    def test_flush_unique_fields(self):
+        """
+        Tests that flushing syncs unsaved model objects on their unique fields, updating the model objects saved by
+        earlier flushes in place.
+        """
+        country = G(Country, code='US', name='USA')
+        initial_data = BaseInitialData()
+
+        with self.assertNumQueries(3):
+            initial_data.flush([Country(code='US', name='United States'), Country(code='CA', name='Canada')])
+
+        self.assertEqual(Country.objects.get(code='US').id, country.id)
+        self.assertEqual(Country.objects.get(code='US').name, 'United States')
+        self.assertEqual(initial_data.get_pks_registered_for_deletion(), {
+            Country: set(Country.objects.values_list('id', flat=True))
+        })
+
+    def test_get_chunk_unique_fields(self):
+        """
+        Tests finding the fields on which the unsaved model objects of every model are synced.
+        """
+        initial_data = BaseInitialData()
+        self.assertEqual(initial_data.get_chunk_unique_fields(Country), ['code'])
+        self.assertEqual(initial_data.get_chunk_unique_fields(CharPkModel), ['key'])
+        self.assertIsNone(initial_data.get_chunk_unique_fields(UUIDModel))
+        self.assertEqual(initial_data.get_chunk_unique_fields(Currency), ['code'])
+        self.assertIsNone(initial_data.get_chunk_unique_fields(Account))
+
+        initial_data.chunk_unique_fields = {Account: ['name'], CantCascadeModel: ['rel_model'], Country: None}
+        self.assertEqual(initial_data.get_chunk_unique_fields(Account), ['name'])
+        self.assertEqual(initial_data.get_chunk_unique_fields(CantCascadeModel), ['rel_model_id'])
+        self.assertIsNone(initial_data.get_chunk_unique_fields(Country))
+
+    def test_generator(self):
+        """
+        Tests that yielded model objects are flushed in chunks while they are generated, that running the generator
+        again keeps the pks of the model objects it yields and that the objects that stop being yielded are deleted.
+        """
+        flushed_counts = []
+
+        class CountryInitialData(BaseInitialData):
+            chunk_size = 2
+            codes = ['a', 'b', 'c', 'd', 'e']
+
+            def update_initial_data(self):
+                for code in self.codes[:-2]:
+                    flushed_counts.append(Country.objects.count())
+                    yield Country(code=code, name=code)
+                yield [Country(code=code, name=code) for code in self.codes[-2:]]
+
+        with patch.object(InitialDataUpdater, 'load_app', return_value=CountryInitialData):
+            InitialDataUpdater().update_apps(['app'])
+
+        # The first chunk is saved before the third object is generated
+        self.assertEqual(flushed_counts, [0, 0, 2])
+        self.assertEqual(sorted(Country.objects.values_list('code', flat=True)), ['a', 'b', 'c', 'd', 'e'])
+        self.assertEqual(RegisteredForDeletionReceipt.objects.count(), 5)
+        pks = dict(Country.objects.values_list('code', 'id'))
+
+        with patch.object(InitialDataUpdater, 'load_app', return_value=CountryInitialData):
+            InitialDataUpdater().update_apps(['app'])
+
+        self.assertEqual(dict(Country.objects.values_list('code', 'id')), pks)
+
+        CountryInitialData.codes = ['a', 'b']
+        with patch.object(InitialDataUpdater, 'load_app', return_value=CountryInitialData):
+            InitialDataUpdater().update_apps(['app'])
+
+        self.assertEqual(dict(Country.objects.values_list('code', 'id')), {'a': pks['a'], 'b': pks['b']})
+
+    def test_generator_uuid_pk(self):
+        """
+        Tests that running a generator twice keeps the uuid pks that were generated for its model objects by the first
+        run instead of syncing on new uuids.
+        """
+        class CurrencyInitialData(BaseInitialData):
+            def update_initial_data(self):
+                yield Currency(code='USD', name='US Dollar')
+                yield Currency(code='EUR', name='Euro')
+
+        with patch.object(InitialDataUpdater, 'load_app', return_value=CurrencyInitialData):
+            InitialDataUpdater().update_apps(['app'])
+        pks = dict(Currency.objects.values_list('code', 'id'))
+
+        with patch.object(InitialDataUpdater, 'load_app', return_value=CurrencyInitialData):
+            InitialDataUpdater().update_apps(['app'])
+
+        self.assertEqual(dict(Currency.objects.values_list('code', 'id')), pks)
+        self.assertEqual(RegisteredForDeletionReceipt.objects.count(), 2)
+
+    def test_sync_pk_not_updated(self):
+        """
+        Tests that a pk given in the rows is not updated on existing model objects.
+        """
+        currency = G(Currency, code='USD', name='Dollar')
+        pks = BaseInitialData().sync(Currency, [{'id': uuid.uuid4(), 'code': 'USD', 'name': 'US Dollar'}], ['code'])
+
+        self.assertEqual(pks, {'USD': currency.id})
+        self.assertEqual(Currency.objects.get().name, 'US Dollar')
+        self.assertEqual(Currency.objects.get().id, currency.id)
+
+    def test_generator_register_for_deletion(self):
+        """
+        Tests that model objects registered for deletion while a generator runs are registered along with the yielded
+        model objects.
+        """
+        registered_account = G(Account)
+
+        class AccountInitialData(BaseInitialData):
+            def update_initial_data(self):
+                self.register_for_deletion(registered_account)
+                yield Account(name='yielded')
+
+        initial_data_updater = InitialDataUpdater()
+        initial_data_updater.initial_data_classes = {'app': AccountInitialData}
+        pks_by_content_type = initial_data_updater.run_initial_data('app')
+
+        yielded_account = Account.objects.get(name='yielded')
+        self.assertEqual(pks_by_content_type, {
+            ContentType.objects.get_for_model(Account).id: {registered_account.id, yielded_account.id}
+        })
+
 
 class TestInvalidDeletions(TransactionTestCase):
     def test_cant_delete_obj_in_receipt(self):
@@ -57,7 +327,7 @@ class TestInvalidDeletions(TransactionTestCase):
 
         account = G(Account)
         RegisteredForDeletionReceipt.objects.create(model_obj=account, register_time=datetime(2013, 4, 5))
-        initial_data_updater.model_objs_registered_for_deletion = []
+        initial_data_updater.pks_registered_for_deletion = {}
 
         self.assertEqual(RegisteredForDeletionReceipt.objects.count(), 2)
         with transaction.atomic():
@@ -65,6 +335,470 @@ class TestInvalidDeletions(TransactionTestCase):
         self.assertEqual(RegisteredForDeletionReceipt.objects.count(), 0)
 
 
+class TestDeleteStaleReceipts(TransactionTestCase):
+    """
+    Tests the batched deletion of stale receipts and their model objects.
+    """
+    def test_deletes_objs_with_queryset_delete(self):
+        """
+        Tests that stale objects are deleted with a queryset delete instead of one delete per object.
+        """
+        accounts = [G(Account) for i in range(5)]
+        for account in accounts:
+            RegisteredForDeletionReceipt.objects.create(model_obj=account, register_time=datetime(2013, 4, 5))
+
+        with patch.object(Account, 'delete', spec_set=True) as delete_patch:
+            InitialDataUpdater().delete_stale_receipts(RegisteredForDeletionReceipt.objects.values_list(
+                'id', 'model_obj_type_id', 'model_obj_id'))
+            self.assertEqual(delete_patch.call_count, 0)
+
+        self.assertEqual(Account.objects.count(), 0)
+        self.assertEqual(RegisteredForDeletionReceipt.objects.count(), 0)
+
+    def test_deletes_objs_in_chunks(self):
+        """
+        Tests that every chunk of stale objects is deleted when the chunk size is smaller than the number of objects.
+        """
+        accounts = [G(Account) for i in range(5)]
+        for account in accounts:
+            RegisteredForDeletionReceipt.objects.create(model_obj=account, register_time=datetime(2013, 4, 5))
+
+        initial_data_updater = InitialDataUpdater({'deletion_chunk_size': 2})
+        with patch.object(
+            InitialDataUpdater, 'delete_model_objs', autospec=True, side_effect=InitialDataUpdater.delete_model_objs
+        ) as delete_patch:
+            initial_data_updater.delete_stale_receipts(RegisteredForDeletionReceipt.objects.values_list(
+                'id', 'model_obj_type_id', 'model_obj_id'))
+            self.assertEqual(delete_patch.call_count, 3)
+
+        self.assertEqual(Account.objects.count(), 0)
+        self.assertEqual(RegisteredForDeletionReceipt.objects.count(), 0)
+
+    def test_protected_obj_falls_back_to_per_obj_deletion(self):
+        """
+        Tests that a protected object in a chunk does not prevent the other objects in the chunk from being deleted.
+        """
+        rel_models = [G(RelModel) for i in range(3)]
+        G(CantCascadeModel, rel_model=rel_models[1])
+        for rel_model in rel_models:
+            RegisteredForDeletionReceipt.objects.create(model_obj=rel_model, register_time=datetime(2013, 4, 5))
+
+        with transaction.atomic():
+            InitialDataUpdater().delete_stale_receipts(RegisteredForDeletionReceipt.objects.values_list(
+                'id', 'model_obj_type_id', 'model_obj_id'))
+
+        self.assertEqual(list(RelModel.objects.all()), [rel_models[1]])
+        self.assertEqual(RegisteredForDeletionReceipt.objects.count(), 0)
+
+    def test_raw_delete(self):
+        """
+        Tests that objects without delete signal receivers or relations to cascade are deleted with a raw delete.
+        """
+        accounts = [G(Account) for i in range(3)]
+        with patch.object(QuerySet, 'delete', spec_set=True) as delete_patch:
+            InitialDataUpdater().delete_model_objs(Account, [account.id for account in accounts[:2]])
+            self.assertEqual(delete_patch.call_count, 0)
+
+        self.assertEqual(list(Account.objects.all()), [accounts[2]])
+
+    def test_raw_delete_referenced(self):
+        """
+        Tests that a forced raw delete of objects that are still referenced falls back on deleting every object on its
+        own instead of leaving a foreign key that fails when the transaction commits.
+        """
+        rel_models = [G(RelModel) for i in range(3)]
+        G(CantCascadeModel, rel_model=rel_models[1])
+        initial_data_updater = InitialDataUpdater()
+        initial_data_updater.initial_data_classes = {
+            'app': type('app', (BaseInitialData,), {'raw_delete_models': {RelModel: True}}),
+        }
+
+        with transaction.atomic():
+            initial_data_updater.delete_model_objs(RelModel, [rel_model.id for rel_model in rel_models])
+
+        self.assertEqual(list(RelModel.objects.all()), [rel_models[1]])
+
+    def test_can_raw_delete(self):
+        """
+        Tests detecting which models can be deleted with a raw delete.
+        """
+        initial_data_updater = InitialDataUpdater()
+        self.assertTrue(initial_data_updater.can_raw_delete(Account))
+        self.assertFalse(initial_data_updater.can_raw_delete(RelModel))
+
+    def test_can_raw_delete_signal_receiver(self):
+        """
+        Tests that models with delete signal receivers are not deleted with a raw delete.
+        """
+        def receiver(sender, **kwargs):
+            pass  # pragma: no cover
+
+        post_delete.connect(receiver, sender=Account)
+        self.addCleanup(post_delete.disconnect, receiver, sender=Account)
+        self.assertFalse(InitialDataUpdater().can_raw_delete(Account))
+
+    def test_can_raw_delete_override(self):
+        """
+        Tests that initial data classes can force either kind of delete.
+        """
+        initial_data_updater = InitialDataUpdater()
+        initial_data_updater.initial_data_classes = {
+            'a': type('a', (BaseInitialData,), {'raw_delete_models': {Account: False}}),
+            'b': None,
+            'c': type('c', (BaseInitialData,), {'raw_delete_models': {RelModel: True}}),
+        }
+        self.assertFalse(initial_data_updater.can_raw_delete(Account))
+        self.assertTrue(initial_data_updater.can_raw_delete(RelModel))
+
+    def test_content_type_without_model(self):
+        """
+        Tests that receipts are deleted when their content type no longer has a model.
+        """
+        content_type = ContentType.objects.create(app_label='missing_app', model='missingmodel')
+        RegisteredForDeletionReceipt.objects.create(
+            model_obj_type=content_type, model_obj_id=1, register_time=datetime(2013, 4, 5))
+
+        InitialDataUpdater().delete_stale_receipts(RegisteredForDeletionReceipt.objects.values_list(
+            'id', 'model_obj_type_id', 'model_obj_id'))
+        self.assertEqual(RegisteredForDeletionReceipt.objects.count(), 0)
+
+
+class UpdateAppsInParallelTest(TransactionTestCase):
+    """
+    Tests updating independent apps at the same time.
+    """
+    def test_update_all_apps_in_parallel(self):
+        """
+        Tests that every app is updated after its dependencies and that the objects registered for deletion of every
+        app are handled.
+        """
+        update_order = []
+
+        def update_initial_data(self):
+            update_order.append(type(self).__name__)
+            return [Account.objects.create(name=type(self).__name__)]
+
+        graph = {'a': ['b', 'c'], 'b': [], 'c': []}
+        with patch_graph(graph, update_initial_data=update_initial_data):
+            with patch.object(InitialDataUpdater, 'update_apps_serially', spec_set=True) as update_apps_patch:
+                initial_data_updater = InitialDataUpdater({'jobs': 2})
+                with patch('dynamic_initial_data.base.apps.get_app_configs', return_value=[]):
+                    initial_data_updater.update_all_apps()
+                self.assertEqual(update_apps_patch.call_count, 0)
+
+                initial_data_updater.update_apps_in_parallel(['a'])
+
+        self.assertEqual(update_order[-1], 'a')
+        self.assertEqual(set(update_order), {'a', 'b', 'c'})
+        self.assertEqual(initial_data_updater.updated_apps, {'a', 'b', 'c'})
+        self.assertEqual(RegisteredForDeletionReceipt.objects.count(), 3)
+
+        # Run again without registering the objects of b. Its object should be deleted.
+        def update_initial_data(self):
+            if type(self).__name__ != 'b':
+                return [Account.objects.get(name=type(self).__name__)]
+
+        with patch_graph(graph, update_initial_data=update_initial_data):
+            InitialDataUpdater({'jobs': 2}).update_apps_in_parallel(['a'])
+
+        self.assertEqual(set(Account.objects.values_list('name', flat=True)), {'a', 'c'})
+        self.assertEqual(RegisteredForDeletionReceipt.objects.count(), 2)
+
+    def test_failed_app_keeps_updated_apps(self):
+        """
+        Tests that apps of previous levels stay updated when an app fails and that deletions are not handled.
+        """
+        def update_initial_data(self):
+            if type(self).__name__ == 'a':
+                raise ValueError
+            return [Account.objects.create(name=type(self).__name__)]
+
+        with patch_graph({'a': ['b'], 'b': []}, update_initial_data=update_initial_data):
+            with self.assertRaises(ValueError):
+                InitialDataUpdater({'jobs': 2}).update_apps_in_parallel(['a'])
+
+        self.assertEqual(list(Account.objects.values_list('name', flat=True)), ['b'])
+        self.assertEqual(RegisteredForDeletionReceipt.objects.count(), 0)
+        self.assertEqual(list(InitialDataCheckpoint.objects.values_list('app', flat=True)), ['b'])
+
+
+class CommitGranularityTest(TestCase):
+    """
+    Tests committing apps on their own or level by level.
+    """
+    def setUp(self):
+        super(CommitGranularityTest, self).setUp()
+        self.failing_app = None
+
+        def update_initial_data(initial_data):
+            app = type(initial_data).__name__
+            if app == self.failing_app:
+                raise ValueError
+            return [Account.objects.get_or_create(name=app)[0]]
+
+        self.graph_patch = patch_graph({'a': ['b', 'c'], 'b': [], 'c': []}, update_initial_data=update_initial_data)
+        self.graph_patch.start()
+        self.addCleanup(self.graph_patch.stop)
+
+    def test_commit_all(self):
+        """
+        Tests that apps are updated in a single transaction by default.
+        """
+        with patch.object(InitialDataUpdater, 'update_apps_in_steps', spec_set=True) as update_apps_patch:
+            InitialDataUpdater().update_apps(['a'])
+        self.assertEqual(update_apps_patch.call_count, 0)
+
+    def test_commit_app(self):
+        """
+        Tests that apps committed before a failing app stay updated and are recorded with checkpoints, which are
+        removed once a run succeeds.
+        """
+        self.failing_app = 'a'
+        with self.assertRaises(ValueError):
+            InitialDataUpdater({'commit': 'app'}).update_apps(['a'])
+
+        self.assertEqual(set(Account.objects.values_list('name', flat=True)), {'b', 'c'})
+        self.assertEqual(set(InitialDataCheckpoint.objects.values_list('app', flat=True)), {'b', 'c'})
+        self.assertEqual(RegisteredForDeletionReceipt.objects.count(), 0)
+
+        self.failing_app = None
+        InitialDataUpdater({'commit': 'app'}).update_apps(['a'])
+
+        self.assertEqual(set(Account.objects.values_list('name', flat=True)), {'a', 'b', 'c'})
+        self.assertEqual(InitialDataCheckpoint.objects.count(), 0)
+        self.assertEqual(RegisteredForDeletionReceipt.objects.count(), 3)
+
+    def test_commit_level(self):
+        """
+        Tests that a failing app rolls back the other apps of its level.
+        """
+        self.failing_app = 'c'
+        with self.assertRaises(ValueError):
+            InitialDataUpdater({'commit': 'level'}).update_apps(['a'])
+
+        self.assertEqual(Account.objects.count(), 0)
+        self.assertEqual(InitialDataCheckpoint.objects.count(), 0)
+
+        self.failing_app = 'a'
+        with self.assertRaises(ValueError):
+            InitialDataUpdater({'commit': 'level'}).update_apps(['a'])
+
+        self.assertEqual(set(Account.objects.values_list('name', flat=True)), {'b', 'c'})
+        self.assertEqual(set(InitialDataCheckpoint.objects.values_list('app', flat=True)), {'b', 'c'})
+
+    def test_resume(self):
+        """
+        Tests that resuming skips the apps committed by the interrupted run and still handles their deletions.
+        """
+        RegisteredForDeletionReceipt.objects.create(
+            model_obj=G(Account, name='stale'), register_time=datetime(2013, 4, 5), app='b')
+
+        self.failing_app = 'a'
+        with self.assertRaises(ValueError):
+            InitialDataUpdater({'commit': 'app'}).update_apps(['a'])
+
+        self.failing_app = None
+        updater = InitialDataUpdater({'commit': 'app', 'resume': True})
+        with patch.object(InitialDataUpdater, 'run_initial_data', wraps=updater.run_initial_data) as run_patch:
+            updater.update_apps(['a'])
+
+        run_patch.assert_called_once_with('a')
+        self.assertEqual(set(Account.objects.values_list('name', flat=True)), {'a', 'b', 'c'})
+        self.assertEqual(set(RegisteredForDeletionReceipt.objects.values_list('app', flat=True)), {'a', 'b', 'c'})
+        self.assertEqual(InitialDataCheckpoint.objects.count(), 0)
+
+    def test_resume_changed_app(self):
+        """
+        Tests that resuming updates a committed app again when its fingerprint changed.
+        """
+        self.failing_app = 'a'
+        with self.assertRaises(ValueError):
+            InitialDataUpdater({'commit': 'app'}).update_apps(['a'])
+        InitialDataCheckpoint.objects.filter(app='b').update(fingerprint='changed')
+
+        self.failing_app = None
+        updater = InitialDataUpdater({'commit': 'app', 'resume': True})
+        with patch.object(InitialDataUpdater, 'run_initial_data', wraps=updater.run_initial_data) as run_patch:
+            updater.update_apps(['a'])
+
+        self.assertEqual({call[0][0] for call in run_patch.call_args_list}, {'a', 'b'})
+
+    def test_resume_without_fingerprint(self):
+        """
+        Tests that resuming updates the committed apps again when their fingerprints cannot be computed.
+        """
+        self.failing_app = 'a'
+        with patch('dynamic_initial_data.base.inspect.getsource', side_effect=OSError, spec_set=True):
+            with self.assertRaises(ValueError):
+                InitialDataUpdater({'commit': 'app'}).update_apps(['a'])
+            self.assertEqual(set(InitialDataCheckpoint.objects.values_list('fingerprint', flat=True)), {None})
+
+            self.failing_app = None
+            updater = InitialDataUpdater({'commit': 'app', 'resume': True})
+            with patch.object(InitialDataUpdater, 'run_initial_data', wraps=updater.run_initial_data) as run_patch:
+                updater.update_apps(['a'])
+
+        self.assertEqual({call[0][0] for call in run_patch.call_args_list}, {'a', 'b', 'c'})
+
+
+class AppOwnershipTest(TestCase):
+    """
+    Tests reconciling only the receipts of the apps that were updated.
+    """
+    def setUp(self):
+        super(AppOwnershipTest, self).setUp()
+        self.account_names = {'a': ['a1', 'a2'], 'b': ['b1']}
+
+        def update_initial_data(initial_data):
+            app = type(initial_data).__name__
+            return [Account.objects.get_or_create(name=name)[0] for name in self.account_names[app]]
+
+        self.graph_patch = patch_graph({'a': [], 'b': []}, update_initial_data=update_initial_data)
+        self.graph_patch.start()
+        self.addCleanup(self.graph_patch.stop)
+
+    def test_update_subset_of_apps(self):
+        """
+        Tests that updating a subset of apps only deletes the objects of those apps.
+        """
+        InitialDataUpdater().update_apps(['a', 'b'])
+        self.assertEqual(
+            dict(RegisteredForDeletionReceipt.objects.values_list('model_obj_id', 'app')),
+            {str(account.id): account.name[0] for account in Account.objects.all()})
+
+        # Only update a, which no longer manages a2. The account of b should remain even though b was not updated.
+        self.account_names = {'a': ['a1'], 'b': []}
+        InitialDataUpdater().update_apps(['a'])
+        self.assertEqual(set(Account.objects.values_list('name', flat=True)), {'a1', 'b1'})
+        self.assertEqual(RegisteredForDeletionReceipt.objects.count(), 2)
+
+        # Updating b deletes b1
+        InitialDataUpdater().update_apps(['b'])
+        self.assertEqual(set(Account.objects.values_list('name', flat=True)), {'a1'})
+
+    def test_shared_objects(self):
+        """
+        Tests that an object registered by more than one app is kept until none of the apps register it anymore, even
+        when only one of the apps is updated.
+        """
+        self.account_names = {'a': ['a1', 'shared'], 'b': ['shared']}
+        InitialDataUpdater().update_apps(['a', 'b'])
+        self.assertEqual(
+            sorted(RegisteredForDeletionReceipt.objects.filter(
+                model_obj_id=str(Account.objects.get(name='shared').id)).values_list('app', flat=True)),
+            ['a', 'b'])
+
+        self.account_names = {'a': ['a1'], 'b': ['shared']}
+        InitialDataUpdater().update_apps(['a'])
+        self.assertEqual(set(Account.objects.values_list('name', flat=True)), {'a1', 'shared'})
+
+        self.account_names = {'a': ['a1'], 'b': []}
+        InitialDataUpdater().update_apps(['b'])
+        self.assertEqual(set(Account.objects.values_list('name', flat=True)), {'a1'})
+        self.assertEqual(list(RegisteredForDeletionReceipt.objects.values_list('app', flat=True)), ['a'])
+
+    def test_reconcile_all_apps(self):
+        """
+        Tests that reconciling all apps deletes the objects owned by apps that were not updated.
+        """
+        account = G(Account)
+        RegisteredForDeletionReceipt.objects.create(model_obj=account, register_time=datetime(2013, 4, 5), app='c')
+
+        InitialDataUpdater().update_apps(['a', 'b'])
+        self.assertTrue(Account.objects.filter(id=account.id).exists())
+
+        InitialDataUpdater().update_apps(['a', 'b'], reconcile_all_apps=True)
+        self.assertFalse(Account.objects.filter(id=account.id).exists())
+        self.assertEqual(RegisteredForDeletionReceipt.objects.count(), 3)
+
+
+class IncrementalUpdateTest(TestCase):
+    """
+    Tests skipping apps whose fingerprint did not change since the last successful run.
+    """
+    def setUp(self):
+        super(IncrementalUpdateTest, self).setUp()
+        self.updated_apps = []
+        self.fingerprints = {}
+
+        def update_initial_data(initial_data):
+            app = type(initial_data).__name__
+            self.updated_apps.append(app)
+            return [Account.objects.get_or_create(name=app)[0]]
+
+        def get_fingerprint(initial_data):
+            return self.fingerprints.get(type(initial_data).__name__)
+
+        self.graph_patch = patch_graph(
+            {'a': ['b'], 'b': [], 'c': []}, update_initial_data=update_initial_data, get_fingerprint=get_fingerprint)
+        self.graph_patch.start()
+        self.addCleanup(self.graph_patch.stop)
+
+    def test_skip_unchanged_apps(self):
+        """
+        Tests that apps are skipped when nothing changed and that the objects they own are not deleted.
+        """
+        InitialDataUpdater({'incremental': True}).update_apps(['a', 'c'])
+        self.assertEqual(self.updated_apps, ['b', 'a', 'c'])
+        self.assertEqual(InitialDataFingerprint.objects.count(), 3)
+
+        receipts = set(RegisteredForDeletionReceipt.objects.values_list('id', 'app', 'register_time'))
+
+        initial_data_updater = InitialDataUpdater({'incremental': True})
+        initial_data_updater.update_apps(['a', 'c'])
+        self.assertEqual(self.updated_apps, ['b', 'a', 'c'])
+        self.assertEqual(initial_data_updater.skipped_apps, {'a', 'b', 'c'})
+        self.assertEqual(Account.objects.count(), 3)
+        self.assertEqual(
+            set(RegisteredForDeletionReceipt.objects.values_list('app', flat=True)), {'a', 'b', 'c'})
+
+        # The receipts of the skipped apps should not have been rewritten
+        self.assertEqual(set(RegisteredForDeletionReceipt.objects.values_list('id', 'app', 'register_time')), receipts)
+
+    def test_changed_dependency(self):
+        """
+        Tests that an app is updated when the fingerprint of one of its dependencies changed.
+        """
+        InitialDataUpdater({'incremental': True}).update_apps(['a', 'c'])
+
+        self.fingerprints['b'] = 'changed'
+        InitialDataUpdater({'incremental': True}).update_apps(['a', 'c'])
+        self.assertEqual(self.updated_apps, ['b', 'a', 'c', 'b', 'a'])
+        self.assertEqual(Account.objects.count(), 3)
+        self.assertEqual(RegisteredForDeletionReceipt.objects.count(), 3)
+
+    def test_is_up_to_date(self):
+        """
+        Tests that apps are up to date once a run stored their fingerprints and until one of them changes.
+        """
+        self.assertFalse(InitialDataUpdater().is_up_to_date(['a']))
+
+        InitialDataUpdater().update_apps(['a', 'c'])
+        self.assertTrue(InitialDataUpdater().is_up_to_date(['a', 'c']))
+
+        self.fingerprints['c'] = 'changed'
+        self.assertTrue(InitialDataUpdater().is_up_to_date(['a']))
+        self.assertFalse(InitialDataUpdater().is_up_to_date(['a', 'c']))
+
+    def test_not_incremental(self):
+        """
+        Tests that apps are not skipped unless updating incrementally.
+        """
+        InitialDataUpdater().update_apps(['c'])
+        InitialDataUpdater().update_apps(['c'])
+        self.assertEqual(self.updated_apps, ['c', 'c'])
+
+    @patch('dynamic_initial_data.base.inspect.getsource', side_effect=OSError, spec_set=True)
+    def test_source_unavailable(self, getsource_patch):
+        """
+        Tests that apps without available source are never skipped.
+        """
+        InitialDataUpdater({'incremental': True}).update_apps(['a'])
+        InitialDataUpdater({'incremental': True}).update_apps(['a'])
+        self.assertEqual(self.updated_apps, ['b', 'a', 'b', 'a'])
+        self.assertEqual(InitialDataFingerprint.objects.count(), 0)
+
+
 class TestHandleDeletions(TestCase):
     """
     Tests the handle_deletions functionality in the InitialDataUpater class.
@@ -84,14 +818,14 @@ class TestHandleDeletions(TestCase):
         Tests creating one object to handle for deletion.
         """
         account = G(Account)
-        self.initial_data_updater.model_objs_registered_for_deletion = [account]
+        register_for_deletion(self.initial_data_updater, account)
 
         self.assertEqual(RegisteredForDeletionReceipt.objects.count(), 0)
         with freeze_time('2013-04-12'):
             self.initial_data_updater.handle_deletions()
         receipt = RegisteredForDeletionReceipt.objects.get()
         self.assertEqual(receipt.model_obj_type, ContentType.objects.get_for_model(Account))
-        self.assertEqual(receipt.model_obj_id, account.id)
+        self.assertEqual(receipt.model_obj_id, str(account.id))
         self.assertEqual(receipt.register_time, datetime(2013, 4, 12))
 
     def test_create_dup_objs(self):
@@ -99,23 +833,93 @@ class TestHandleDeletions(TestCase):
         Tests creating duplicate objects for deletion.
         """
         account = G(Account)
-        self.initial_data_updater.model_objs_registered_for_deletion = [account, account]
+        register_for_deletion(self.initial_data_updater, account, account)
 
         self.assertEqual(RegisteredForDeletionReceipt.objects.count(), 0)
         with freeze_time('2013-04-12'):
             self.initial_data_updater.handle_deletions()
         receipt = RegisteredForDeletionReceipt.objects.get()
         self.assertEqual(receipt.model_obj_type, ContentType.objects.get_for_model(Account))
-        self.assertEqual(receipt.model_obj_id, account.id)
+        self.assertEqual(receipt.model_obj_id, str(account.id))
         self.assertEqual(receipt.register_time, datetime(2013, 4, 12))
 
+    def test_copy_receipts(self):
+        """
+        Tests copying receipts into the receipt table when there are enough of them. Only the receipts of objects that
+        were registered for the first time are written.
+        """
+        initial_data_updater = InitialDataUpdater({'copy_threshold': 2})
+        accounts = [G(Account), G(Account), G(Account)]
+        RegisteredForDeletionReceipt.objects.create(
+            model_obj=accounts[0], register_time=datetime(2013, 4, 5), app='other')
+        RegisteredForDeletionReceipt.objects.create(
+            model_obj=accounts[1], register_time=datetime(2013, 4, 5), app='app')
+        RegisteredForDeletionReceipt.objects.create(
+            model_obj=accounts[2], register_time=datetime(2013, 4, 5), app='app')
+        register_for_deletion(initial_data_updater, accounts[0], accounts[1])
+
+        with freeze_time('2013-04-12'):
+            initial_data_updater.handle_deletions()
+
+        self.assertEqual(Account.objects.count(), 2)
+        self.assertEqual(
+            set(RegisteredForDeletionReceipt.objects.values_list('model_obj_id', 'register_time', 'app')),
+            {(str(accounts[0].id), datetime(2013, 4, 12), 'app'), (str(accounts[1].id), datetime(2013, 4, 5), 'app')})
+
+    def test_non_integer_pks(self):
+        """
+        Tests handling the deletions of objects with uuid and char pks, including pks with characters that have to be
+        escaped when receipts are copied.
+        """
+        uuid_models = [G(UUIDModel), G(UUIDModel)]
+        char_pk_models = [G(CharPkModel, key='tab\there'), G(CharPkModel, key='back\\slash')]
+        for copy_threshold in [100, 1]:
+            initial_data_updater = InitialDataUpdater({'copy_threshold': copy_threshold})
+            register_for_deletion(initial_data_updater, *uuid_models + char_pk_models)
+            initial_data_updater.handle_deletions()
+
+            self.assertEqual(
+                set(RegisteredForDeletionReceipt.objects.values_list('model_obj_id', flat=True)),
+                {str(model_obj.pk) for model_obj in uuid_models + char_pk_models})
+
+        initial_data_updater = InitialDataUpdater()
+        register_for_deletion(initial_data_updater, uuid_models[0], char_pk_models[1])
+        initial_data_updater.handle_deletions()
+
+        self.assertEqual(list(UUIDModel.objects.all()), [uuid_models[0]])
+        self.assertEqual(list(CharPkModel.objects.all()), [char_pk_models[1]])
+        self.assertEqual(RegisteredForDeletionReceipt.objects.count(), 2)
+
+    def test_dedup_pks_of_different_types(self):
+        """
+        Tests that a pk registered by an app both as its own type and as a string is only stored once.
+        """
+        uuid_model = G(UUIDModel)
+        self.initial_data_updater.pks_registered_for_deletion = {
+            'a': self.initial_data_updater.get_pks_by_content_type([uuid_model], {UUIDModel: [str(uuid_model.pk)]}),
+        }
+        self.initial_data_updater.handle_deletions()
+
+        self.assertEqual(
+            list(RegisteredForDeletionReceipt.objects.values_list('model_obj_id', 'app')), [(str(uuid_model.pk), 'a')])
+
+    def test_to_pks(self):
+        """
+        Tests converting pks stored as text to the type of the pk of their model.
+        """
+        uuid_model = G(UUIDModel)
+
+        self.assertEqual(self.initial_data_updater.to_pks(
+            ContentType.objects.get_for_model(UUIDModel).id, [str(uuid_model.pk)]), [uuid_model.pk])
+        self.assertEqual(self.initial_data_updater.to_pks(ContentType.objects.get_for_model(Account).id, ['1']), [1])
+
     def test_create_dup_proxy_objs(self):
         """
         Tests creating duplicate objects for deletion when one is a proxy of another.
         """
         account = G(Account)
         proxy_account = ProxyAccount.objects.get(id=account.id)
-        self.initial_data_updater.model_objs_registered_for_deletion = [account, account, proxy_account]
+        register_for_deletion(self.initial_data_updater, account, account, proxy_account)
 
         self.assertEqual(RegisteredForDeletionReceipt.objects.count(), 0)
         with freeze_time('2013-04-12'):
@@ -124,14 +928,14 @@ class TestHandleDeletions(TestCase):
 
         receipt = RegisteredForDeletionReceipt.objects.get(model_obj_type=ContentType.objects.get_for_model(account))
         self.assertEqual(receipt.model_obj_type, ContentType.objects.get_for_model(Account))
-        self.assertEqual(receipt.model_obj_id, account.id)
+        self.assertEqual(receipt.model_obj_id, str(account.id))
         self.assertEqual(receipt.register_time, datetime(2013, 4, 12))
 
         receipt = RegisteredForDeletionReceipt.objects.get(
             model_obj_type=ContentType.objects.get_for_model(proxy_account, for_concrete_model=False))
         self.assertEqual(
             receipt.model_obj_type, ContentType.objects.get_for_model(ProxyAccount, for_concrete_model=False))
-        self.assertEqual(receipt.model_obj_id, proxy_account.id)
+        self.assertEqual(receipt.model_obj_id, str(proxy_account.id))
         self.assertEqual(receipt.register_time, datetime(2013, 4, 12))
 
     def test_create_delete_one_obj(self):
@@ -139,18 +943,18 @@ class TestHandleDeletions(TestCase):
         Tests creating one object to handle for deletion and then deleting it.
         """
         account = G(Account)
-        self.initial_data_updater.model_objs_registered_for_deletion = [account]
+        register_for_deletion(self.initial_data_updater, account)
 
         self.assertEqual(RegisteredForDeletionReceipt.objects.count(), 0)
         with freeze_time('2013-04-12'):
             self.initial_data_updater.handle_deletions()
         receipt = RegisteredForDeletionReceipt.objects.get()
         self.assertEqual(receipt.model_obj_type, ContentType.objects.get_for_model(Account))
-        self.assertEqual(receipt.model_obj_id, account.id)
+        self.assertEqual(receipt.model_obj_id, str(account.id))
         self.assertEqual(receipt.register_time, datetime(2013, 4, 12))
 
         # Now, don't register the object for deletion and run it again at a different time
-        self.initial_data_updater.model_objs_registered_for_deletion = []
+        self.initial_data_updater.pks_registered_for_deletion = {}
         with freeze_time('2013-04-12 05:00:00'):
             self.initial_data_updater.handle_deletions()
         # The object should be deleted, along with its receipt
@@ -162,37 +966,59 @@ class TestHandleDeletions(TestCase):
         Tests creating one object to handle for deletion and then updating it.
         """
         account = G(Account)
-        self.initial_data_updater.model_objs_registered_for_deletion = [account]
+        register_for_deletion(self.initial_data_updater, account)
 
         self.assertEqual(RegisteredForDeletionReceipt.objects.count(), 0)
         with freeze_time('2013-04-12'):
             self.initial_data_updater.handle_deletions()
         receipt = RegisteredForDeletionReceipt.objects.get()
         self.assertEqual(receipt.model_obj_type, ContentType.objects.get_for_model(Account))
-        self.assertEqual(receipt.model_obj_id, account.id)
+        self.assertEqual(receipt.model_obj_id, str(account.id))
         self.assertEqual(receipt.register_time, datetime(2013, 4, 12))
 
         # Run the deletion handler again at a different time. It should not delete the object
         with freeze_time('2013-04-12 05:00:00'):
             self.initial_data_updater.handle_deletions()
-        # The object should not be deleted, along with its receipt
+        # The object should not be deleted, along with its receipt, which is not rewritten
         self.assertEqual(Account.objects.count(), 1)
         self.assertEqual(RegisteredForDeletionReceipt.objects.count(), 1)
-        self.assertEqual(RegisteredForDeletionReceipt.objects.get().register_time, datetime(2013, 4, 12, 5))
+        self.assertEqual(RegisteredForDeletionReceipt.objects.get().register_time, datetime(2013, 4, 12))
+
+    def test_stale_regardless_of_register_time(self):
+        """
+        Tests that receipts keep the registration time of their first run and that receipts are stale when their
+        objects are not registered again regardless of their registration time.
+        """
+        account = G(Account)
+        stale_account = G(Account)
+        register_for_deletion(self.initial_data_updater, account, stale_account)
+        self.initial_data_updater.handle_deletions()
+        receipt = RegisteredForDeletionReceipt.objects.get(model_obj_id=str(account.id))
+
+        # Unregister one of the accounts and run again at the same time
+        register_for_deletion(self.initial_data_updater, account)
+        with freeze_time(receipt.register_time):
+            self.initial_data_updater.handle_deletions()
+
+        self.assertEqual(list(RegisteredForDeletionReceipt.objects.values_list('id', 'register_time')), [
+            (receipt.id, receipt.register_time)
+        ])
+        self.assertEqual(list(Account.objects.all()), [account])
+        self.assertFalse(InitialDataRun.objects.exists())
 
     def test_delete_already_deleted_obj(self):
         """
         Tests the case when an object that was registered for deletion has already been deleted.
         """
         account = G(Account)
-        self.initial_data_updater.model_objs_registered_for_deletion = [account]
+        register_for_deletion(self.initial_data_updater, account)
 
         self.assertEqual(RegisteredForDeletionReceipt.objects.count(), 0)
         with freeze_time('2013-04-12'):
             self.initial_data_updater.handle_deletions()
         receipt = RegisteredForDeletionReceipt.objects.get()
         self.assertEqual(receipt.model_obj_type, ContentType.objects.get_for_model(Account))
-        self.assertEqual(receipt.model_obj_id, account.id)
+        self.assertEqual(receipt.model_obj_id, str(account.id))
         self.assertEqual(receipt.register_time, datetime(2013, 4, 12))
 
         # Delete the model object. The receipt should still exist
@@ -200,7 +1026,7 @@ class TestHandleDeletions(TestCase):
         self.assertEqual(RegisteredForDeletionReceipt.objects.count(), 1)
 
         # Now, don't register the object for deletion and run it again at a different time
-        self.initial_data_updater.model_objs_registered_for_deletion = []
+        self.initial_data_updater.pks_registered_for_deletion = {}
         with freeze_time('2013-04-12 05:00:00'):
             self.initial_data_updater.handle_deletions()
         # The object should be deleted, along with its receipt
@@ -208,10 +1034,130 @@ class TestHandleDeletions(TestCase):
         self.assertEqual(RegisteredForDeletionReceipt.objects.count(), 0)
 
 
+class ReceiptGroupsTest(TestCase):
+    """
+    Tests storing the objects registered for deletion as groups of pks per app and content type.
+    """
+    def setUp(self):
+        super(ReceiptGroupsTest, self).setUp()
+        self.accounts = {}
+
+        def update_initial_data(initial_data):
+            app = type(initial_data).__name__
+            return [Account.objects.get_or_create(name=name)[0] for name in self.accounts.get(app, [])]
+
+        self.graph_patch = patch_graph({'a': [], 'b': []}, update_initial_data=update_initial_data)
+        self.graph_patch.start()
+        self.addCleanup(self.graph_patch.stop)
+
+    def test_replace_groups_without_apps(self):
+        """
+        Tests that handling the deletions of apps without initial data keeps every group.
+        """
+        self.accounts = {'a': ['a1']}
+        InitialDataUpdater({'receipts': 'groups'}).update_apps(['a'])
+
+        InitialDataUpdater({'receipts': 'groups'}).handle_deletions(app_names=[])
+
+        self.assertEqual(self.get_groups(), {('a', Account): ['a1']})
+        self.assertEqual(list(Account.objects.values_list('name', flat=True)), ['a1'])
+
+    def get_groups(self):
+        return {
+            (group.app, group.model_obj_type.model_class()): [
+                Account.objects.get(id=pk).name for pk in group.model_obj_ids
+            ]
+            for group in RegisteredForDeletionGroup.objects.all()
+        }
+
+    def test_replace_groups(self):
+        """
+        Tests that every app stores a group per content type and that objects no group holds are deleted.
+        """
+        self.accounts = {'a': ['a1', 'a2'], 'b': ['b1']}
+        InitialDataUpdater({'receipts': 'groups'}).update_apps(['a', 'b'])
+        self.assertEqual(self.get_groups(), {('a', Account): ['a1', 'a2'], ('b', Account): ['b1']})
+        self.assertEqual(RegisteredForDeletionReceipt.objects.count(), 0)
+
+        self.accounts = {'a': ['a1'], 'b': []}
+        InitialDataUpdater({'receipts': 'groups'}).update_apps(['a', 'b'])
+
+        self.assertEqual(self.get_groups(), {('a', Account): ['a1']})
+        self.assertEqual(list(Account.objects.values_list('name', flat=True)), ['a1'])
+        self.assertEqual(InitialDataRun.objects.count(), 1)
+
+    def test_moved_objects(self):
+        """
+        Tests that objects held by a group that is kept are not deleted when they are no longer registered by the
+        app that owned them.
+        """
+        self.accounts = {'a': ['shared'], 'b': []}
+        InitialDataUpdater({'receipts': 'groups'}).update_apps(['a', 'b'])
+
+        # The object moves to b while a is not reconciled and is kept when a stops registering it
+        self.accounts = {'a': [], 'b': ['shared']}
+        InitialDataUpdater({'receipts': 'groups'}).update_apps(['b'])
+        InitialDataUpdater({'receipts': 'groups'}).update_apps(['a'])
+
+        self.assertEqual(self.get_groups(), {('b', Account): ['shared']})
+        self.assertEqual(list(Account.objects.values_list('name', flat=True)), ['shared'])
+
+    def test_shared_objects(self):
+        """
+        Tests that an object registered by more than one app is kept when only one of the apps stops registering it.
+        """
+        self.accounts = {'a': ['shared'], 'b': ['shared']}
+        InitialDataUpdater({'receipts': 'groups'}).update_apps(['a', 'b'])
+        self.assertEqual(self.get_groups(), {('a', Account): ['shared'], ('b', Account): ['shared']})
+
+        self.accounts = {'a': [], 'b': ['shared']}
+        InitialDataUpdater({'receipts': 'groups'}).update_apps(['a'])
+        self.assertEqual(list(Account.objects.values_list('name', flat=True)), ['shared'])
+
+    def test_non_integer_pks(self):
+        """
+        Tests that the groups of objects with uuid pks find their stale objects.
+        """
+        uuid_models = [G(UUIDModel), G(UUIDModel)]
+        initial_data_updater = InitialDataUpdater({'receipts': 'groups'})
+        initial_data_updater.pks_registered_for_deletion = {
+            'a': initial_data_updater.get_pks_by_content_type(uuid_models)
+        }
+        initial_data_updater.handle_deletions()
+
+        initial_data_updater = InitialDataUpdater({'receipts': 'groups'})
+        initial_data_updater.pks_registered_for_deletion = {
+            'a': initial_data_updater.get_pks_by_content_type(uuid_models[:1])
+        }
+        initial_data_updater.handle_deletions()
+
+        self.assertEqual(list(UUIDModel.objects.all()), uuid_models[:1])
+        self.assertEqual(list(RegisteredForDeletionGroup.objects.values_list('model_obj_ids', flat=True)), [
+            [str(uuid_models[0].pk)]
+        ])
+
+    def test_skipped_app(self):
+        """
+        Tests that the groups of skipped apps are kept.
+        """
+        self.accounts = {'a': ['a1'], 'b': ['b1']}
+        InitialDataUpdater({'receipts': 'groups'}).update_apps(['a', 'b'])
+
+        self.accounts = {'a': [], 'b': []}
+        InitialDataUpdater({'receipts': 'groups', 'incremental': True}).update_apps(['a', 'b'])
+
+        self.assertEqual(self.get_groups(), {('a', Account): ['a1'], ('b', Account): ['b1']})
+
+
 class InitialDataUpdaterTest(TestCase):
     """
     Tests the functionality of the InitialDataUpdater
     """
+    def setUp(self):
+        super(InitialDataUpdaterTest, self).setUp()
+        initial_data_class_registry.clear()
+        self.addCleanup(initial_data_class_registry.clear)
+
     def test_verbose_option(self):
         """
         Verifies that the verbose option gets set from the manage options
@@ -222,6 +1168,22 @@ class InitialDataUpdaterTest(TestCase):
         # cover the branch that prints if verbose is true
         initial_data_manager.log('test')
 
+    def test_has_initial_data_module(self):
+        """
+        Tests finding initial data modules without importing them.
+        """
+        initial_data_updater = InitialDataUpdater()
+        self.assertTrue(initial_data_updater.has_initial_data_module('dynamic_initial_data.tests.fake_app_2'))
+        self.assertFalse(initial_data_updater.has_initial_data_module('dynamic_initial_data.tests.fake_app_1'))
+        self.assertFalse(initial_data_updater.has_initial_data_module('dynamic_initial_data'))
+        self.assertNotIn('dynamic_initial_data.tests.fake_app_2.fixtures.initial_data', sys.modules)
+
+    def test_has_initial_data_module_missing_app(self):
+        """
+        Tests that apps that cannot be found are left to be loaded.
+        """
+        self.assertTrue(InitialDataUpdater().has_initial_data_module('missing_app'))
+
     @patch('dynamic_initial_data.base.import_string', return_value=MockInitialData)
     def test_load_app_exists(self, import_patch):
         """
@@ -240,6 +1202,26 @@ class InitialDataUpdaterTest(TestCase):
         initial_data_updater.load_app('fake')
         self.assertEqual(import_patch.call_count, 1)
 
+    @patch('dynamic_initial_data.base.import_string', return_value=MockClass)
+    def test_load_app_cached_none(self, import_patch):
+        """
+        Tests that an app without initial data is cached across updaters.
+        """
+        InitialDataUpdater().load_app('fake')
+        self.assertIsNone(InitialDataUpdater().load_app('fake'))
+        self.assertEqual(import_patch.call_count, 1)
+
+    @patch('dynamic_initial_data.base.import_string', side_effect=ModuleNotFoundError('No module named fake'))
+    def test_load_app_cached_missing_module(self, import_patch):
+        """
+        Tests that a missing module is cached across updaters and raised again.
+        """
+        with self.assertRaises(ModuleNotFoundError):
+            InitialDataUpdater().load_app('fake')
+        with self.assertRaises(ModuleNotFoundError):
+            InitialDataUpdater().load_app('fake')
+        self.assertEqual(import_patch.call_count, 1)
+
     @patch('dynamic_initial_data.base.import_string', return_value=MockClass)
     def test_load_app_doesnt_exist(self, import_patch):
         """
@@ -298,8 +1280,9 @@ class InitialDataUpdaterTest(TestCase):
             self.assertEqual(1, update_initial_data_patch2.call_count)
 
     @override_settings(INSTALLED_APPS=('django.contrib.auth', 'django.contrib.admin',))
+    @patch('dynamic_initial_data.base.InitialDataUpdater.load_app', return_value=MockInitialData, spec_set=True)
     @patch('dynamic_initial_data.base.InitialDataUpdater.update_app', spec_set=True)
-    def test_update_all_apps(self, update_app_patch):
+    def test_update_all_apps(self, update_app_patch, load_app_patch):
         """
         Verifies that update_app is called with all installed apps
         """
@@ -321,3 +1304,111 @@ class InitialDataUpdaterTest(TestCase):
         """
         with self.assertRaises(InitialDataMissingApp):
             InitialDataUpdater().get_dependency_call_list('fake')
+
+
+class UpdatePlanTest(TestCase):
+    """
+    Tests planning the order in which apps are updated from the dependency graph.
+    """
+    def test_dependencies_before_dependents(self):
+        """
+        Tests that every app is planned after its dependencies and in the order the apps were given otherwise.
+        """
+        with patch_graph({'a': ['b', 'c'], 'b': ['d'], 'c': ['d'], 'd': [], 'e': []}):
+            self.assertEqual(InitialDataUpdater().get_update_plan(['e', 'a']), ['e', 'd', 'b', 'c', 'a'])
+
+    def test_diamond_loads_each_app_once(self):
+        """
+        Tests that a diamond dependency graph loads each app once.
+        """
+        with patch_graph({'a': ['b', 'c'], 'b': ['d'], 'c': ['d'], 'd': []}) as load_app_patch:
+            initial_data_updater = InitialDataUpdater()
+            initial_data_updater.get_update_plan(['a', 'b', 'c', 'd'])
+            initial_data_updater.get_update_plan(['a', 'b', 'c', 'd'])
+            self.assertEqual(
+                sorted(call[0][0] for call in load_app_patch.call_args_list if call[0][0] != 'a'), ['b', 'c', 'd'])
+
+    def test_updated_apps_left_out(self):
+        """
+        Tests that apps that were already updated are not planned again.
+        """
+        with patch_graph({'a': ['b'], 'b': []}):
+            initial_data_updater = InitialDataUpdater()
+            initial_data_updater.updated_apps.add('b')
+            self.assertEqual(initial_data_updater.get_update_plan(['a']), ['a'])
+
+    def test_deep_chain(self):
+        """
+        Tests that a dependency chain deeper than the recursion limit can be planned.
+        """
+        depth = 5000
+        graph = {str(i): [str(i + 1)] for i in range(depth)}
+        graph[str(depth)] = []
+        with patch_graph(graph):
+            plan = InitialDataUpdater().get_update_plan(['0'])
+        self.assertEqual(plan, [str(i) for i in range(depth, -1, -1)])
+
+    def test_all_cycles_reported(self):
+        """
+        Tests that every cycle in the graph is reported at once.
+        """
+        graph = {'a': ['b'], 'b': ['c'], 'c': ['a'], 'd': ['d'], 'e': ['f'], 'f': ['e', 'a']}
+        with patch_graph(graph):
+            with self.assertRaises(InitialDataCircularDependency) as context:
+                InitialDataUpdater().get_update_plan(['a', 'd', 'e'])
+        self.assertEqual(
+            context.exception.cycles, [['a', 'b', 'c', 'a'], ['d', 'd'], ['e', 'f', 'e']])
+        self.assertEqual(str(context.exception), (
+            'Circular dependency found\na\n--b\n----c\n------a\n\nd\n--d\n\ne\n--f\n----e'
+        ))
+
+    def test_circular_dependency_call_list(self):
+        """
+        Tests that the exception still accepts the dependency and call list it was raised with before 3.0.0.
+        """
+        call_list = ['a', 'b', 'c']
+        exception = InitialDataCircularDependency(dep='a', call_list=call_list)
+        self.assertEqual(exception.cycles, [['a', 'b', 'c', 'a']])
+        self.assertEqual(str(exception), 'Circular dependency found\na\n--b\n----c\n------a')
+        self.assertEqual(call_list, ['a', 'b', 'c'])
+
+    def test_missing_dependency(self):
+        """
+        Tests that a dependency that cannot be loaded raises an error.
+        """
+        with patch_graph({'a': ['b']}):
+            with self.assertRaises(InitialDataMissingApp):
+                InitialDataUpdater().get_update_plan(['a'])
+
+    def test_dependency_without_initial_data(self):
+        """
+        Tests that depending on an app that was found to have no initial data raises an error.
+        """
+        initial_data_classes = {'a': type('a', (MockInitialData,), {'dependencies': ['b']}), 'b': None}
+        with patch.object(InitialDataUpdater, 'load_app', side_effect=initial_data_classes.get, spec_set=True):
+            with self.assertRaises(InitialDataMissingApp):
+                InitialDataUpdater().get_update_plan(['b', 'a'])
+
+    def test_get_dependency_call_list(self):
+        """
+        Tests that the dependency call list contains the transitive dependencies of an app in update order.
+        """
+        with patch_graph({'a': ['b', 'c'], 'b': ['c'], 'c': []}):
+            self.assertEqual(InitialDataUpdater().get_dependency_call_list('a'), ['c', 'b'])
+
+    def test_update_levels(self):
+        """
+        Tests that apps are split into levels of apps that only depend on apps in previous levels.
+        """
+        with patch_graph({'a': ['b', 'c'], 'b': ['d'], 'c': [], 'd': [], 'e': []}):
+            self.assertEqual(
+                InitialDataUpdater().get_update_levels(['a', 'e']), [['d', 'c', 'e'], ['b'], ['a']])
+
+    @patch('dynamic_initial_data.base.InitialDataUpdater.load_app', return_value=MockClass, spec_set=True)
+    def test_get_dependency_call_list_not_initial_data(self, load_app_patch):
+        """
+        Tests that an app whose initial data class is not a BaseInitialData raises an error.
+        """
+        load_app_patch.return_value = None
+        with self.assertRaises(InitialDataMissingApp):
+            InitialDataUpdater().get_dependency_call_list('fake')
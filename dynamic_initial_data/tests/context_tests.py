@@ -0,0 +1,92 @@
+from django.test import TestCase
+from django_dynamic_fixture import G
+from unittest.mock import patch
+
+from dynamic_initial_data.base import BaseInitialData, InitialDataUpdater
+from dynamic_initial_data.context import InitialDataContext
+from dynamic_initial_data.tests.models import Account, Country
+
+
+class InitialDataContextTest(TestCase):
+    """
+    Tests sharing model objects between apps through the context of a run.
+    """
+    def test_publish(self):
+        """
+        Tests publishing and getting model objects by natural key.
+        """
+        context = InitialDataContext()
+        account = G(Account, name='account')
+        context.publish(account, 'account')
+        context.publish_many([G(Country, code='US'), G(Country, code='CA')], 'code')
+
+        self.assertEqual(context.get(Account, 'account'), account)
+        self.assertEqual(context.get(Country, 'CA').code, 'CA')
+        self.assertIsNone(context.get(Country, 'account'))
+        self.assertEqual(context.get(Account, 'missing', default=1), 1)
+        self.assertEqual(len(context), 3)
+
+    def test_bounded(self):
+        """
+        Tests that the model objects used least recently are evicted once the context is full.
+        """
+        context = InitialDataContext(max_size=2)
+        accounts = [Account(name=str(i)) for i in range(3)]
+        context.publish(accounts[0], 0)
+        context.publish(accounts[1], 1)
+        context.get(Account, 0)
+        context.publish(accounts[2], 2)
+
+        self.assertEqual(len(context), 2)
+        self.assertEqual(context.get(Account, 0), accounts[0])
+        self.assertIsNone(context.get(Account, 1))
+
+    def test_invalidate(self):
+        """
+        Tests forgetting the model objects of one model or of every model.
+        """
+        context = InitialDataContext()
+        context.publish(Account(name='account'), 'account')
+        context.publish(Country(code='US'), 'US')
+
+        context.invalidate(Account)
+        self.assertIsNone(context.get(Account, 'account'))
+        self.assertIsNotNone(context.get(Country, 'US'))
+
+        context.invalidate()
+        self.assertEqual(len(context), 0)
+
+    def test_resolve(self):
+        """
+        Tests that resolving a model object that was not published fetches it once.
+        """
+        context = InitialDataContext()
+        account = G(Account, name='account')
+
+        with self.assertNumQueries(1):
+            self.assertEqual(context.resolve(Account, 'account', name='account'), account)
+            self.assertEqual(context.resolve(Account, 'account', name='account'), account)
+
+    def test_shared_by_apps(self):
+        """
+        Tests that apps resolve the model objects published by their dependencies without queries.
+        """
+        test = self
+        resolved_accounts = []
+
+        class UpstreamInitialData(BaseInitialData):
+            def update_initial_data(self):
+                self.context.publish(Account.objects.create(name='upstream'), 'upstream')
+
+        class DownstreamInitialData(BaseInitialData):
+            dependencies = ['upstream']
+
+            def update_initial_data(self):
+                with test.assertNumQueries(0):
+                    resolved_accounts.append(self.context.resolve(Account, 'upstream', name='upstream'))
+
+        initial_data_classes = {'upstream': UpstreamInitialData, 'downstream': DownstreamInitialData}
+        with patch.object(InitialDataUpdater, 'load_app', side_effect=initial_data_classes.get):
+            InitialDataUpdater().update_app('downstream')
+
+        self.assertEqual(resolved_accounts, [Account.objects.get(name='upstream')])
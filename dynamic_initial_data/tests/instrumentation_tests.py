@@ -0,0 +1,166 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django_dynamic_fixture import G
+from unittest.mock import patch
+
+from dynamic_initial_data.base import BaseInitialData, InitialDataUpdater
+from dynamic_initial_data.instrumentation import RunReport
+from dynamic_initial_data.models import RegisteredForDeletionReceipt
+from dynamic_initial_data.tests.models import Account
+
+
+class AccountInitialData(BaseInitialData):
+    def update_initial_data(self):
+        self.register_queryset_for_deletion(Account.objects.all())
+
+
+class RunReportTest(TestCase):
+    """
+    Tests measuring the steps of a run.
+    """
+    def setUp(self):
+        self.report_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.report_dir)
+
+    def test_disabled(self):
+        """
+        Tests that nothing is measured when the report is not enabled.
+        """
+        run_report = RunReport()
+        with run_report.measure('update_app', 'app') as metrics:
+            Account.objects.count()
+        self.assertEqual(metrics.query_count, 0)
+        self.assertEqual(run_report.steps, [])
+
+    def test_measure(self):
+        """
+        Tests measuring the queries of a step.
+        """
+        run_report = RunReport(enabled=True)
+        self.addCleanup(run_report.stop)
+        with run_report.measure('update_app', 'app') as metrics:
+            Account.objects.count()
+            Account.objects.count()
+            metrics.rows_registered = 3
+
+        self.assertEqual(run_report.steps, [metrics])
+        self.assertEqual(metrics.query_count, 2)
+        self.assertEqual(metrics.rows_registered, 3)
+        self.assertTrue(metrics.wall_time >= metrics.db_time > 0)
+
+    def test_count_rows(self):
+        """
+        Tests counting the rows inserted, updated and deleted by a step, leaving out the tables of this app.
+        """
+        run_report = RunReport(enabled=True)
+        self.addCleanup(run_report.stop)
+        with run_report.measure('update_app', 'app') as metrics:
+            Account.objects.bulk_create([Account(name='first'), Account(name='second')])
+            Account.objects.filter(name='first').update(name='third')
+            Account.objects.filter(name='second').delete()
+            RegisteredForDeletionReceipt.objects.create(
+                model_obj=Account.objects.get(), register_time=datetime(2013, 4, 5), app='app')
+
+        self.assertEqual((metrics.rows_inserted, metrics.rows_updated, metrics.rows_deleted), (2, 1, 1))
+
+    def test_update_apps(self):
+        """
+        Tests that every app update and the handling of deletions are measured.
+        """
+        G(Account)
+        G(Account)
+        updater = InitialDataUpdater({'instrument': True})
+        self.addCleanup(updater.run_report.stop)
+        with patch.object(InitialDataUpdater, 'load_app', return_value=AccountInitialData):
+            updater.update_apps(['app'])
+
+        self.assertEqual(
+            [(metrics.step, metrics.app, metrics.rows_registered) for metrics in updater.run_report.steps],
+            [('update_app', 'app', 2), ('handle_deletions', None, 2)])
+
+    def test_write_json(self):
+        """
+        Tests writing a JSON report.
+        """
+        run_report = RunReport(enabled=True)
+        self.addCleanup(run_report.stop)
+        with run_report.measure('handle_deletions'):
+            Account.objects.count()
+
+        path = os.path.join(self.report_dir, 'report.json')
+        run_report.write(path)
+        with open(path) as report_file:
+            steps = json.load(report_file)['steps']
+
+        self.assertEqual(len(steps), 1)
+        self.assertEqual(steps[0]['step'], 'handle_deletions')
+        self.assertEqual(steps[0]['query_count'], 1)
+
+    def test_write_prometheus(self):
+        """
+        Tests writing a prometheus textfile.
+        """
+        run_report = RunReport(enabled=True)
+        self.addCleanup(run_report.stop)
+        with run_report.measure('update_app', 'app'):
+            Account.objects.count()
+
+        path = os.path.join(self.report_dir, 'report.prom')
+        run_report.write(path, 'prometheus')
+        with open(path) as report_file:
+            lines = report_file.read().splitlines()
+
+        self.assertIn('# TYPE dynamic_initial_data_queries gauge', lines)
+        self.assertIn('dynamic_initial_data_queries{step="update_app",app="app"} 1', lines)
+
+    def test_command_report(self):
+        """
+        Tests writing a report with the management command.
+        """
+        path = os.path.join(self.report_dir, 'report.json')
+        with patch.object(InitialDataUpdater, 'load_app', return_value=AccountInitialData):
+            call_command('update_initial_data', app='app', report=path)
+
+        with open(path) as report_file:
+            steps = json.load(report_file)['steps']
+        self.assertEqual([step['step'] for step in steps], ['update_app'])
+
+    def test_command_plan(self):
+        """
+        Tests that planning a run prints the rows every step would change and rolls the changes back.
+        """
+        account = G(Account)
+
+        class ReplacingInitialData(BaseInitialData):
+            def update_initial_data(self):
+                return [Account.objects.create(name='new')]
+
+        with patch.object(InitialDataUpdater, 'load_app', return_value=AccountInitialData):
+            InitialDataUpdater().update_apps(['app'])
+
+        stdout = StringIO()
+        with patch.object(InitialDataUpdater, 'load_app', return_value=ReplacingInitialData):
+            call_command('update_initial_data', app='app', handle_deletions=True, plan=True, stdout=stdout)
+
+        lines = [line.split() for line in stdout.getvalue().splitlines()]
+        self.assertEqual(lines[0], ['app', 'inserted', 'updated', 'deleted', 'seconds'])
+        self.assertEqual([line[:4] for line in lines[1:]], [
+            ['app', '1', '0', '0'],
+            ['(handle_deletions)', '0', '0', '1'],
+        ])
+        self.assertEqual(list(Account.objects.all()), [account])
+
+    def test_command_plan_mute_signals(self):
+        """
+        Tests that signals cannot be muted while planning, since the changes they would be sent for are rolled back.
+        """
+        with self.assertRaises(CommandError):
+            call_command('update_initial_data', plan=True, mute_signals=['tests.Account'])
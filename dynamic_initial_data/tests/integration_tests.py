@@ -3,7 +3,7 @@ from django.test import TestCase
 from django.core.management import call_command
 from unittest.mock import patch
 
-from dynamic_initial_data.base import BaseInitialData, InitialDataUpdater
+from dynamic_initial_data.base import BaseInitialData, InitialDataUpdater, initial_data_class_registry
 from dynamic_initial_data.models import RegisteredForDeletionReceipt
 from dynamic_initial_data.tests.models import Account
 
@@ -12,6 +12,18 @@ class IntegrationTest(TestCase):
     """
     Tests the full initial data process.
     """
+    def setUp(self):
+        super(IntegrationTest, self).setUp()
+        initial_data_class_registry.clear()
+        self.addCleanup(initial_data_class_registry.clear)
+
+    def get_receipts(self):
+        """
+        Returns the receipts of one app. Every installed app runs the patched initial data class, and every app has its
+        own receipts for the objects it registers.
+        """
+        return RegisteredForDeletionReceipt.objects.filter(app='dynamic_initial_data')
+
     def test_create_account(self):
         """
         Tests creating a test account in the initial data process.
@@ -25,8 +37,8 @@ class IntegrationTest(TestCase):
 
         with patch.object(InitialDataUpdater, 'load_app', return_value=AccountInitialData) as load_app_mock:
             InitialDataUpdater().update_app('test_app')
-            # It should be called twice - once for initial loading, and twice for dependency testing
-            self.assertEqual(load_app_mock.call_count, 2)
+            # It should be called once since the dependency graph loads every app once
+            self.assertEqual(load_app_mock.call_count, 1)
 
         # Verify an account object was created
         self.assertEqual(Account.objects.count(), 1)
@@ -53,7 +65,7 @@ class IntegrationTest(TestCase):
 
         # Verify an account object was created and is managed by a deletion receipt
         self.assertEqual(Account.objects.count(), 1)
-        self.assertEqual(RegisteredForDeletionReceipt.objects.count(), 1)
+        self.assertEqual(self.get_receipts().count(), 1)
 
     def test_handle_deletions_returned_from_update_initial_data(self):
         """
@@ -84,7 +96,7 @@ class IntegrationTest(TestCase):
 
         # Verify an account object was created and is managed by a deletion receipt
         self.assertEqual(Account.objects.count(), 1)
-        self.assertEqual(RegisteredForDeletionReceipt.objects.count(), 1)
+        self.assertEqual(self.get_receipts().count(), 1)
 
         # Run the initial data process again, this time not registering the account for
         # deletion. It should be deleted.
@@ -93,7 +105,7 @@ class IntegrationTest(TestCase):
 
         # Verify there are no accounts or receipts
         self.assertEqual(Account.objects.count(), 0)
-        self.assertEqual(RegisteredForDeletionReceipt.objects.count(), 0)
+        self.assertEqual(self.get_receipts().count(), 0)
 
     def test_handle_deletions_updates_returned_from_update_initial_data(self):
         """
@@ -123,7 +135,7 @@ class IntegrationTest(TestCase):
 
         # Verify two account objects were created and are managed by deletion receipts
         self.assertEqual(Account.objects.count(), 2)
-        self.assertEqual(RegisteredForDeletionReceipt.objects.count(), 2)
+        self.assertEqual(self.get_receipts().count(), 2)
 
         # Run the initial data process again, this time deleting the account named 'hi2'
         with patch.object(InitialDataUpdater, 'load_app', return_value=AccountInitialData2):
@@ -131,8 +143,8 @@ class IntegrationTest(TestCase):
 
         # Verify only the 'hi' account exists
         self.assertEqual(Account.objects.count(), 1)
-        self.assertEqual(RegisteredForDeletionReceipt.objects.count(), 1)
-        self.assertEqual(RegisteredForDeletionReceipt.objects.get().model_obj.name, 'hi')
+        self.assertEqual(self.get_receipts().count(), 1)
+        self.assertEqual(self.get_receipts().get().model_obj.name, 'hi')
 
     def test_handle_deletions_registered_from_update_initial_data(self):
         """
@@ -163,7 +175,7 @@ class IntegrationTest(TestCase):
 
         # Verify an account object was created and is managed by a deletion receipt
         self.assertEqual(Account.objects.count(), 1)
-        self.assertEqual(RegisteredForDeletionReceipt.objects.count(), 1)
+        self.assertEqual(self.get_receipts().count(), 1)
 
         # Run the initial data process again, this time not registering the account for
         # deletion. It should be deleted.
@@ -172,7 +184,7 @@ class IntegrationTest(TestCase):
 
         # Verify there are no accounts or receipts
         self.assertEqual(Account.objects.count(), 0)
-        self.assertEqual(RegisteredForDeletionReceipt.objects.count(), 0)
+        self.assertEqual(self.get_receipts().count(), 0)
 
     def test_handle_deletions_updates_registered_from_update_initial_data(self):
         """
@@ -203,7 +215,7 @@ class IntegrationTest(TestCase):
 
         # Verify two account objects were created and are managed by deletion receipts
         self.assertEqual(Account.objects.count(), 2)
-        self.assertEqual(RegisteredForDeletionReceipt.objects.count(), 2)
+        self.assertEqual(self.get_receipts().count(), 2)
 
         # Run the initial data process again, this time deleting the account named 'hi2'
         with patch.object(InitialDataUpdater, 'load_app', return_value=AccountInitialData2):
@@ -211,8 +223,42 @@ class IntegrationTest(TestCase):
 
         # Verify only the 'hi' account exists
         self.assertEqual(Account.objects.count(), 1)
-        self.assertEqual(RegisteredForDeletionReceipt.objects.count(), 1)
-        self.assertEqual(RegisteredForDeletionReceipt.objects.get().model_obj.name, 'hi')
+        self.assertEqual(self.get_receipts().count(), 1)
+        self.assertEqual(self.get_receipts().get().model_obj.name, 'hi')
+
+    def test_handle_deletions_registered_pks(self):
+        """
+        Tests handling of deletions when pks and querysets are registered from the update_initial_data function.
+        """
+        class AccountInitialData1(BaseInitialData):
+            """
+            The initial data code the first time it is called. It registers three accounts for deletion by pk and
+            by queryset.
+            """
+            def update_initial_data(self):
+                self.register_pks_for_deletion(Account, [Account.objects.get_or_create(name='hi')[0].id])
+                Account.objects.get_or_create(name='hi2')
+                Account.objects.get_or_create(name='hi3')
+                self.register_queryset_for_deletion(Account.objects.exclude(name='hi'))
+
+        class AccountInitialData2(BaseInitialData):
+            """
+            The initial data code the second time it is called. It only manages the 'hi2' account.
+            """
+            def update_initial_data(self):
+                self.register_queryset_for_deletion(Account.objects.filter(name='hi2'))
+
+        with patch.object(InitialDataUpdater, 'load_app', return_value=AccountInitialData1):
+            InitialDataUpdater().update_all_apps()
+
+        self.assertEqual(Account.objects.count(), 3)
+        self.assertEqual(self.get_receipts().count(), 3)
+
+        with patch.object(InitialDataUpdater, 'load_app', return_value=AccountInitialData2):
+            InitialDataUpdater().update_all_apps()
+
+        self.assertEqual(list(Account.objects.values_list('name', flat=True)), ['hi2'])
+        self.assertEqual(self.get_receipts().count(), 1)
 
     @patch('dynamic_initial_data.base.InitialDataUpdater.log')
     def test_missing_initial_data_file(self, mock_log):
@@ -0,0 +1,46 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection
+from django.test import TestCase
+
+from dynamic_initial_data.locks import AdvisoryLock
+
+
+def try_lock_in_other_connection(name):
+    """
+    Tries to acquire an advisory lock from the connection of a new thread and releases it again if it was acquired.
+    """
+    def try_lock():
+        lock = AdvisoryLock(name)
+        try:
+            return lock.acquire(wait=False)
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(try_lock).result()
+
+
+class AdvisoryLockTest(TestCase):
+    """
+    Tests the advisory lock that keeps concurrent runs apart.
+    """
+    def test_acquire_release(self):
+        """
+        Tests that a lock held by one connection cannot be acquired by another until it is released.
+        """
+        lock = AdvisoryLock('test')
+        self.assertTrue(lock.acquire(wait=False))
+        self.assertFalse(try_lock_in_other_connection('test'))
+        self.assertTrue(try_lock_in_other_connection('other'))
+
+        lock.release()
+        self.assertTrue(try_lock_in_other_connection('test'))
+
+    def test_key(self):
+        """
+        Tests that the key of a lock is a signed 64 bit integer derived from its name.
+        """
+        self.assertEqual(AdvisoryLock('test').key, AdvisoryLock('test').key)
+        self.assertNotEqual(AdvisoryLock('test').key, AdvisoryLock('other').key)
+        self.assertTrue(-2 ** 63 <= AdvisoryLock('test').key < 2 ** 63)
@@ -1,7 +1,13 @@
+from io import StringIO
+
 from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
 from django.test import TestCase
 from unittest.mock import patch
 
+from dynamic_initial_data.locks import AdvisoryLock
+
 
 class UpdateInitialDataTest(TestCase):
     """
@@ -24,3 +30,109 @@ class UpdateInitialDataTest(TestCase):
             call_command('update_initial_data', app='app_path')
             self.assertEqual(1, update_patch.call_count)
             update_patch.assert_called_with('app_path')
+
+    def test_app_handle_deletions_arguments(self):
+        """
+        Tests the management command with the --app and --handle-deletions arguments. Verifies that the deletions of
+        only the provided app are handled.
+        """
+        with patch('dynamic_initial_data.base.InitialDataUpdater.update_apps') as update_patch:
+            call_command('update_initial_data', app='app_path', handle_deletions=True)
+            update_patch.assert_called_once_with(['app_path'])
+
+    def test_jobs_argument(self):
+        """
+        Tests the management command with the --jobs argument. Verifies that apps are updated in parallel.
+        """
+        with patch('dynamic_initial_data.base.InitialDataUpdater.update_apps_in_parallel') as update_patch:
+            call_command('update_initial_data', jobs=2)
+            self.assertEqual(1, update_patch.call_count)
+
+    def test_incremental_argument(self):
+        """
+        Tests the management command with the --incremental argument.
+        """
+        with patch('dynamic_initial_data.base.InitialDataUpdater.update_apps') as update_patch:
+            call_command('update_initial_data', incremental=True)
+            self.assertEqual(1, update_patch.call_count)
+
+    def test_commit_argument(self):
+        """
+        Tests the management command with the --commit argument. Verifies that apps are committed on their own.
+        """
+        with patch('dynamic_initial_data.base.InitialDataUpdater.update_apps_in_steps') as update_patch:
+            call_command('update_initial_data', commit='app')
+            self.assertEqual(1, update_patch.call_count)
+
+    def test_resume_argument(self):
+        """
+        Tests the management command with the --resume argument.
+        """
+        with patch('dynamic_initial_data.base.InitialDataUpdater.update_apps_in_steps') as update_patch:
+            call_command('update_initial_data', commit='app', resume=True)
+            self.assertEqual(1, update_patch.call_count)
+
+    def test_mute_signals_argument(self):
+        """
+        Tests the management command with the --mute-signals argument.
+        """
+        with patch('dynamic_initial_data.base.InitialDataUpdater.update_apps') as update_patch:
+            call_command('update_initial_data', mute_signals=['tests.Account'])
+            self.assertEqual(1, update_patch.call_count)
+
+    @patch.object(AdvisoryLock, 'release')
+    @patch.object(AdvisoryLock, 'acquire', return_value=True)
+    def test_lock_argument(self, acquire_patch, release_patch):
+        """
+        Tests the management command with the --lock argument. Verifies that apps are updated while holding the lock.
+        """
+        with patch('dynamic_initial_data.base.InitialDataUpdater.update_all_apps') as update_patch:
+            call_command('update_initial_data', lock='wait')
+            self.assertEqual(1, update_patch.call_count)
+        acquire_patch.assert_called_once_with(wait=False)
+        self.assertEqual(1, release_patch.call_count)
+
+    @patch.object(AdvisoryLock, 'release')
+    @patch.object(AdvisoryLock, 'acquire', return_value=False)
+    def test_lock_argument_skip(self, acquire_patch, release_patch):
+        """
+        Tests that the command skips the update at once when another run holds the lock.
+        """
+        stdout = StringIO()
+        with patch('dynamic_initial_data.base.InitialDataUpdater.update_all_apps') as update_patch:
+            call_command('update_initial_data', lock='skip', stdout=stdout)
+            self.assertEqual(0, update_patch.call_count)
+        self.assertEqual(0, release_patch.call_count)
+        self.assertIn('another run holds the lock', stdout.getvalue())
+
+    @patch.object(AdvisoryLock, 'release')
+    @patch.object(AdvisoryLock, 'acquire', side_effect=[False, True, False, True])
+    def test_lock_argument_wait(self, acquire_patch, release_patch):
+        """
+        Tests that the command waits for the lock and only updates the apps when the other run did not leave them up
+        to date.
+        """
+        with patch('dynamic_initial_data.base.InitialDataUpdater.update_all_apps') as update_patch:
+            with patch('dynamic_initial_data.base.InitialDataUpdater.is_up_to_date', return_value=True):
+                call_command('update_initial_data', lock='wait', stdout=StringIO())
+            self.assertEqual(0, update_patch.call_count)
+
+            with patch('dynamic_initial_data.base.InitialDataUpdater.is_up_to_date', return_value=False):
+                call_command('update_initial_data', lock='wait')
+            self.assertEqual(1, update_patch.call_count)
+        self.assertEqual(2, release_patch.call_count)
+
+    def test_receipts_groups_argument_postgres_only(self):
+        """
+        Tests that storing receipts as groups is rejected on databases other than postgres.
+        """
+        with patch.object(connections[DEFAULT_DB_ALIAS], 'vendor', 'sqlite'):
+            with self.assertRaisesMessage(CommandError, '--receipts groups requires a postgres database'):
+                call_command('update_initial_data', receipts='groups')
+
+    def test_receipts_groups_app_without_initial_data(self):
+        """
+        Tests handling the deletions of an app without initial data with receipts stored as rows and as groups.
+        """
+        call_command('update_initial_data', app='django.contrib.auth', handle_deletions=True, receipts='groups')
+        call_command('update_initial_data', app='django.contrib.auth', handle_deletions=True, receipts='rows')
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+
+from django.db import models, migrations
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tests', '0002_country'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UUIDModel',
+            fields=[
+                ('id', models.UUIDField(primary_key=True, default=uuid.uuid4, serialize=False)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CharPkModel',
+            fields=[
+                ('key', models.CharField(max_length=64, primary_key=True, serialize=False)),
+            ],
+        ),
+    ]
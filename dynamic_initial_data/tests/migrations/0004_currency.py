@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+
+from django.db import models, migrations
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tests', '0003_uuidmodel_charpkmodel'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Currency',
+            fields=[
+                ('id', models.UUIDField(primary_key=True, default=uuid.uuid4, serialize=False)),
+                ('code', models.CharField(max_length=3, unique=True)),
+                ('name', models.CharField(max_length=64)),
+            ],
+        ),
+    ]
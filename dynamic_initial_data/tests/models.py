@@ -1,3 +1,5 @@
+import uuid
+
 from django.db import models
 
 
@@ -22,3 +24,35 @@ class RelModel(models.Model):
 
 class CantCascadeModel(models.Model):
     rel_model = models.ForeignKey(RelModel, on_delete=models.PROTECT)
+
+
+class Country(models.Model):
+    """
+    A test model for syncing reference data.
+    """
+    code = models.CharField(max_length=2, unique=True)
+    name = models.CharField(max_length=64)
+    population = models.IntegerField(default=0)
+
+
+class UUIDModel(models.Model):
+    """
+    A test model with a uuid pk.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4)
+
+
+class CharPkModel(models.Model):
+    """
+    A test model with a char pk.
+    """
+    key = models.CharField(max_length=64, primary_key=True)
+
+
+class Currency(models.Model):
+    """
+    A test model for syncing reference data with a uuid pk.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4)
+    code = models.CharField(max_length=3, unique=True)
+    name = models.CharField(max_length=64)
@@ -0,0 +1,72 @@
+from django.apps import apps
+from django.contrib.auth.models import Permission
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.sql import emit_post_migrate_signal
+from django.test import TestCase
+from django.test.runner import DiscoverRunner
+from unittest.mock import patch
+
+from dynamic_initial_data.base import InitialDataUpdater
+from dynamic_initial_data.runner import InitialDataTestRunner
+
+
+class InitialDataTestRunnerTest(TestCase):
+    """
+    Tests loading initial data once per test session.
+    """
+    @patch.object(InitialDataUpdater, 'update_all_apps', spec_set=True)
+    def test_setup_databases(self, update_all_apps_patch):
+        """
+        Tests that initial data is loaded once when the test database is migrated.
+        """
+        def migrate(**kwargs):
+            emit_post_migrate_signal(0, False, 'default')
+            return []
+
+        runner = InitialDataTestRunner()
+        with patch.object(DiscoverRunner, 'setup_databases', side_effect=migrate):
+            self.assertEqual(runner.setup_databases(), [])
+
+        self.assertEqual(update_all_apps_patch.call_count, 1)
+
+        # The runner stops receiving post_migrate signals once the test databases are set up
+        runner.initial_data_loaded = False
+        emit_post_migrate_signal(0, False, 'default')
+        self.assertEqual(update_all_apps_patch.call_count, 1)
+
+    def test_load_initial_data_after_last_app(self):
+        """
+        Tests that initial data is loaded on the post_migrate signal of the last app, after the content types and
+        permissions of every app were created.
+        """
+        def update_all_apps():
+            self.assertTrue(ContentType.objects.filter(app_label='tests').exists())
+            self.assertTrue(Permission.objects.filter(content_type__app_label='tests').exists())
+
+        def migrate(**kwargs):
+            # The content types and permissions of every app are created again by the receivers of the signals
+            ContentType.objects.all().delete()
+            ContentType.objects.clear_cache()
+            emit_post_migrate_signal(0, False, 'default')
+            return []
+
+        runner = InitialDataTestRunner()
+        with patch.object(InitialDataUpdater, 'update_all_apps', side_effect=update_all_apps) as update_all_apps_patch:
+            runner.initial_data_loaded = False
+            runner.load_initial_data(sender=apps.get_app_config('auth'))
+            self.assertEqual(update_all_apps_patch.call_count, 0)
+
+            with patch.object(DiscoverRunner, 'setup_databases', side_effect=migrate):
+                runner.setup_databases()
+            self.assertEqual(update_all_apps_patch.call_count, 1)
+
+    @patch.object(InitialDataUpdater, 'update_all_apps', spec_set=True)
+    def test_load_initial_data_other_database(self, update_all_apps_patch):
+        """
+        Tests that migrating a database other than the default database does not load initial data.
+        """
+        runner = InitialDataTestRunner()
+        runner.initial_data_loaded = False
+        runner.load_initial_data(using='other')
+
+        self.assertEqual(update_all_apps_patch.call_count, 0)
@@ -0,0 +1,246 @@
+from datetime import datetime
+
+from django.contrib.admin.models import LogEntry
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.test import TestCase, TransactionTestCase
+from django_dynamic_fixture import G
+from unittest.mock import MagicMock, patch
+
+from dynamic_initial_data.base import BaseInitialData, InitialDataUpdater
+from dynamic_initial_data.models import RegisteredForDeletionReceipt
+from dynamic_initial_data.signals import MutedSignals, initial_data_changed
+from dynamic_initial_data.tests.models import Account, Country, ProxyAccount
+
+
+class MutedSignalsTest(TestCase):
+    """
+    Tests muting the signals of models while initial data is updated.
+    """
+    def setUp(self):
+        super(MutedSignalsTest, self).setUp()
+        self.post_save_receiver = MagicMock()
+        self.post_delete_receiver = MagicMock()
+        self.changed_receiver = MagicMock()
+        post_save.connect(self.post_save_receiver)
+        post_delete.connect(self.post_delete_receiver)
+        initial_data_changed.connect(self.changed_receiver)
+        self.addCleanup(post_save.disconnect, self.post_save_receiver)
+        self.addCleanup(post_delete.disconnect, self.post_delete_receiver)
+        self.addCleanup(initial_data_changed.disconnect, self.changed_receiver)
+
+    def test_mute(self):
+        """
+        Tests that the signals of muted models are not sent and that a single changed signal is sent instead.
+        """
+        with MutedSignals(['tests.Account']):
+            account = Account.objects.create(name='account')
+            deleted_account = ProxyAccount.objects.create(name='deleted')
+            deleted_account_id = deleted_account.id
+            deleted_account.delete()
+            Country.objects.create(code='US')
+
+        self.assertEqual([call[1]['sender'] for call in self.post_save_receiver.call_args_list], [Country])
+        self.assertEqual(self.post_delete_receiver.call_count, 0)
+        self.assertEqual(
+            [(call[1]['sender'], call[1]['saved_pks'], call[1]['deleted_pks'])
+             for call in self.changed_receiver.call_args_list],
+            [(Account, {account.id}, set()), (ProxyAccount, {deleted_account_id}, {deleted_account_id})])
+
+        # The signals are sent again after the context exits
+        Account.objects.create(name='account')
+        self.assertEqual(self.post_save_receiver.call_count, 2)
+
+    def test_nested(self):
+        """
+        Tests that the changed signal is only sent when the outermost context exits.
+        """
+        muted_signals = MutedSignals([Account])
+        with muted_signals:
+            with muted_signals:
+                account = Account.objects.create(name='account')
+            self.assertEqual(self.changed_receiver.call_count, 0)
+
+        self.changed_receiver.assert_called_once_with(
+            signal=initial_data_changed, sender=Account, saved_pks={account.id}, deleted_pks=set())
+
+    def test_error(self):
+        """
+        Tests that no changed signal is sent when the context exits with an error.
+        """
+        with self.assertRaises(ValueError):
+            with MutedSignals([Account]):
+                Account.objects.create(name='account')
+                raise ValueError
+
+        self.assertEqual(self.changed_receiver.call_count, 0)
+        self.assertEqual(self.post_save_receiver.call_count, 0)
+
+    def test_error_after_commit(self):
+        """
+        Tests that the changes committed before the context exits with an error are still sent.
+        """
+        muted_signals = MutedSignals([Account])
+        with self.assertRaises(ValueError):
+            with muted_signals:
+                account = Account.objects.create(name='account')
+                muted_signals.commit()
+                Account.objects.create(name='rolled back')
+                raise ValueError
+
+        self.changed_receiver.assert_called_once_with(
+            signal=initial_data_changed, sender=Account, saved_pks={account.id}, deleted_pks=set())
+
+    def test_hide_receivers(self):
+        """
+        Tests that a muted model only counts as having no receivers while its receivers are hidden and that other
+        muted models count as having receivers even without any.
+        """
+        muted_signals = MutedSignals([Account, Country])
+        with muted_signals:
+            self.assertTrue(post_save.has_listeners(Account))
+            with muted_signals.hide_receivers(Account):
+                self.assertFalse(post_save.has_listeners(Account))
+                self.assertFalse(post_save.has_listeners(ProxyAccount))
+                self.assertTrue(post_save.has_listeners(Country))
+                self.assertTrue(pre_delete.has_listeners(Country))
+
+    def test_no_models(self):
+        """
+        Tests that nothing is muted without models.
+        """
+        with MutedSignals():
+            Account.objects.create(name='account')
+
+        self.assertEqual(self.post_save_receiver.call_count, 1)
+        self.assertEqual(self.changed_receiver.call_count, 0)
+
+    def test_update_apps(self):
+        """
+        Tests that the objects saved by initial data and the stale objects deleted afterwards are sent with a single
+        changed signal.
+        """
+        stale_account = G(Account)
+        RegisteredForDeletionReceipt.objects.create(
+            model_obj=stale_account, register_time=datetime(2013, 4, 5), app='app')
+        self.post_save_receiver.reset_mock()
+
+        class AccountInitialData(BaseInitialData):
+            def update_initial_data(self):
+                return [Account.objects.create(name='account')]
+
+        with patch.object(InitialDataUpdater, 'load_app', return_value=AccountInitialData):
+            InitialDataUpdater({'mute_signals': ['tests.Account']}).update_apps(['app'])
+
+        account = Account.objects.get()
+        self.assertNotIn(Account, [call[1]['sender'] for call in self.post_save_receiver.call_args_list])
+        self.assertNotIn(Account, [call[1]['sender'] for call in self.post_delete_receiver.call_args_list])
+        self.changed_receiver.assert_called_once_with(
+            signal=initial_data_changed, sender=Account, saved_pks={account.id}, deleted_pks={stale_account.id})
+
+    def test_cascade_deleted(self):
+        """
+        Tests that the objects of a muted model that are deleted by a cascade from a stale object are sent with the
+        changed signal.
+        """
+        stale_user = G(User)
+        log_entry = LogEntry.objects.create(user=stale_user, action_flag=1, content_type=None)
+        RegisteredForDeletionReceipt.objects.create(model_obj=stale_user, register_time=datetime(2013, 4, 5), app='app')
+
+        class EmptyInitialData(BaseInitialData):
+            def update_initial_data(self):
+                return []
+
+        with patch.object(InitialDataUpdater, 'load_app', return_value=EmptyInitialData):
+            InitialDataUpdater({'mute_signals': ['admin.LogEntry']}).update_apps(['app'])
+
+        self.assertFalse(User.objects.exists())
+        self.assertFalse(LogEntry.objects.exists())
+        self.changed_receiver.assert_called_once_with(
+            signal=initial_data_changed, sender=LogEntry, saved_pks=set(), deleted_pks={log_entry.id})
+
+    def test_sync_saved(self):
+        """
+        Tests that the model objects created and updated by sync are sent with the changed signal while unchanged
+        model objects are not.
+        """
+        unchanged_country = G(Country, code='US', name='United States')
+        changed_country = G(Country, code='CA', name='Kanada')
+
+        class CountryInitialData(BaseInitialData):
+            def update_initial_data(self):
+                self.sync(Country, [
+                    {'code': 'US', 'name': 'United States'},
+                    {'code': 'CA', 'name': 'Canada'},
+                    {'code': 'MX', 'name': 'Mexico'},
+                ], ['code'])
+
+        with patch.object(InitialDataUpdater, 'load_app', return_value=CountryInitialData):
+            InitialDataUpdater({'mute_signals': ['tests.Country']}).update_apps(['app'])
+
+        self.assertEqual(Country.objects.get(id=unchanged_country.id).name, 'United States')
+        self.changed_receiver.assert_called_once_with(
+            signal=initial_data_changed, sender=Country,
+            saved_pks={changed_country.id, Country.objects.get(code='MX').id}, deleted_pks=set())
+
+    def test_flush_saved(self):
+        """
+        Tests that the model objects bulk created by a generator are sent with the changed signal.
+        """
+        class AccountGeneratorInitialData(BaseInitialData):
+            def update_initial_data(self):
+                yield Account(name='yielded')
+
+        with patch.object(InitialDataUpdater, 'load_app', return_value=AccountGeneratorInitialData):
+            InitialDataUpdater({'mute_signals': ['tests.Account']}).update_apps(['app'])
+
+        self.changed_receiver.assert_called_once_with(
+            signal=initial_data_changed, sender=Account, saved_pks={Account.objects.get().id}, deleted_pks=set())
+
+
+class AccountInitialData(BaseInitialData):
+    """
+    Initial data that saves an account.
+    """
+    def update_initial_data(self):
+        return [Account.objects.create(name='account')]
+
+
+class FailingInitialData(BaseInitialData):
+    """
+    Initial data that depends on the app of `AccountInitialData` and fails after saving an account.
+    """
+    dependencies = ['app']
+
+    def update_initial_data(self):
+        Account.objects.create(name='rolled back')
+        raise ValueError
+
+
+class MutedSignalsCommitTest(TransactionTestCase):
+    """
+    Tests sending the changes of the apps that were committed before a run failed.
+    """
+    def setUp(self):
+        super(MutedSignalsCommitTest, self).setUp()
+        self.changed_receiver = MagicMock()
+        initial_data_changed.connect(self.changed_receiver)
+        self.addCleanup(initial_data_changed.disconnect, self.changed_receiver)
+
+    def test_committed_apps(self):
+        """
+        Tests that the changes of the apps that were committed on their own or by worker threads are sent when a
+        later app fails, while the changes of the failed app are not.
+        """
+        for options in [{'commit': 'app'}, {'commit': 'level'}, {'jobs': 2}]:
+            self.changed_receiver.reset_mock()
+            Account.objects.all().delete()
+
+            with patch.object(InitialDataUpdater, 'load_app', side_effect={
+                'app': AccountInitialData, 'failing': FailingInitialData
+            }.get):
+                with self.assertRaises(ValueError):
+                    InitialDataUpdater(dict(options, mute_signals=['tests.Account'])).update_apps(['failing'])
+
+            self.changed_receiver.assert_called_once_with(
+                signal=initial_data_changed, sender=Account, saved_pks={Account.objects.get().id}, deleted_pks=set())
@@ -0,0 +1,144 @@
+from io import StringIO
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TransactionTestCase
+from unittest.mock import patch
+
+from dynamic_initial_data.base import BaseInitialData, InitialDataUpdater
+from dynamic_initial_data.models import RegisteredForDeletionReceipt
+from dynamic_initial_data.tenants import TenantUpdater
+from dynamic_initial_data.tests.models import Account
+
+
+class SearchPathInitialData(BaseInitialData):
+    def update_initial_data(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SHOW search_path')
+            return [Account.objects.create(name=cursor.fetchone()[0])]
+
+
+class TenantUpdaterTest(TransactionTestCase):
+    """
+    Tests updating the initial data of many databases and schemas.
+    """
+    databases = {'default', 'other'}
+
+    def test_get_tenants(self):
+        """
+        Tests building a tenant for every schema of every database.
+        """
+        self.assertEqual(TenantUpdater.get_tenants(), [('default', None)])
+        self.assertEqual(TenantUpdater.get_tenants(['default', 'other'], ['a', 'b']), [
+            ('default', 'a'), ('default', 'b'), ('other', 'a'), ('other', 'b')
+        ])
+
+    def test_connect(self):
+        """
+        Tests that the connection to a tenant uses the default alias and the schema of the tenant as its search path.
+        """
+        tenant_connection = TenantUpdater().connect('default', 'acme')
+
+        self.assertEqual(tenant_connection.alias, 'default')
+        self.assertEqual(tenant_connection.settings_dict['OPTIONS']['options'], '-c search_path="acme"')
+        self.assertNotIn('options', connection.settings_dict['OPTIONS'])
+
+    def test_connect_quoted_schema(self):
+        """
+        Tests that schema names with capitals, spaces, quotes and backslashes become the search path as they are.
+        """
+        tenant_connection = TenantUpdater().connect('default', 'Acme "Corp" \\ Inc')
+        try:
+            with tenant_connection.cursor() as cursor:
+                cursor.execute('SHOW search_path')
+                self.assertEqual(cursor.fetchone()[0], '"Acme ""Corp"" \\ Inc"')
+        finally:
+            tenant_connection.close()
+
+    def test_update_tenants(self):
+        """
+        Tests that every tenant is updated on a connection bound to its schema and that a failed tenant does not stop
+        the others.
+        """
+        # The tenants share the test database, so they are updated one after another
+        with patch.object(InitialDataUpdater, 'load_app', return_value=SearchPathInitialData):
+            results = TenantUpdater().update_tenants([
+                ('default', None), ('missing', None), ('default', 'public')
+            ], ['app'])
+
+        self.assertEqual([(result.database, result.succeeded) for result in results], [
+            ('default', True), ('missing', False), ('default', True)
+        ])
+        self.assertIn('missing: failed', str(results[1]))
+
+        # The second update of the default database deleted the account of the first one
+        self.assertEqual(list(Account.objects.values_list('name', flat=True)), ['"public"'])
+        self.assertEqual(RegisteredForDeletionReceipt.objects.count(), 1)
+
+    def test_update_tenants_content_types(self):
+        """
+        Tests that receipts are stored with the content type ids of the database of every tenant when the ids differ
+        between databases.
+        """
+        ContentType.objects.db_manager('other').get_for_model(Account).delete()
+        other_account_type = ContentType.objects.db_manager('other').create(app_label='tests', model='account')
+        self.assertNotEqual(other_account_type.id, ContentType.objects.get_for_model(Account).id)
+
+        for jobs in [1, 2]:
+            with patch.object(InitialDataUpdater, 'load_app', return_value=SearchPathInitialData):
+                results = TenantUpdater({'jobs': jobs}).update_tenants([('default', None), ('other', None)], ['app'])
+
+            self.assertEqual([result.succeeded for result in results], [True, True])
+            self.assertEqual(
+                RegisteredForDeletionReceipt.objects.get().model_obj_type_id,
+                ContentType.objects.get_for_model(Account).id)
+            self.assertEqual(
+                RegisteredForDeletionReceipt.objects.using('other').get().model_obj_type_id, other_account_type.id)
+            self.assertEqual(Account.objects.using('other').count(), 1)
+
+    def test_update_tenants_without_deletions(self):
+        """
+        Tests that the deletions of the given apps are only handled when asked for.
+        """
+        with patch.object(InitialDataUpdater, 'load_app', return_value=SearchPathInitialData):
+            TenantUpdater().update_tenants([('default', None)], ['app'])
+            first_account = Account.objects.get()
+
+            TenantUpdater().update_tenants([('default', None)], ['app'], handle_deletions=False)
+            self.assertEqual(Account.objects.count(), 2)
+            self.assertEqual(RegisteredForDeletionReceipt.objects.get().model_obj_id, str(first_account.id))
+
+            TenantUpdater().update_tenants([('default', None)], ['app'])
+            self.assertFalse(Account.objects.filter(id=first_account.id).exists())
+
+    def test_mute_signals_at_the_same_time(self):
+        """
+        Tests that signals cannot be muted while tenants are updated at the same time.
+        """
+        with self.assertRaises(ValueError):
+            TenantUpdater({'jobs': 2, 'mute_signals': ['tests.Account']})
+
+    def test_command(self):
+        """
+        Tests updating tenants with the management command, which fails when a tenant fails.
+        """
+        stdout = StringIO()
+        with patch.object(InitialDataUpdater, 'load_app', return_value=SearchPathInitialData):
+            call_command('update_initial_data', databases=['default'], stdout=stdout)
+
+            with self.assertRaises(CommandError):
+                call_command('update_initial_data', databases=['default', 'missing'], stdout=stdout)
+
+        self.assertTrue(stdout.getvalue().startswith('default: updated'))
+
+    def test_command_app(self):
+        """
+        Tests that the management command only handles the deletions of an app of every tenant with --handle-deletions.
+        """
+        with patch.object(TenantUpdater, 'update_tenants', return_value=[]) as update_patch:
+            call_command('update_initial_data', app='app', databases=['default'])
+            call_command('update_initial_data', app='app', databases=['default'], handle_deletions=True)
+
+        self.assertEqual([call[1]['handle_deletions'] for call in update_patch.call_args_list], [False, True])
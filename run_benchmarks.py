@@ -0,0 +1,193 @@
+"""
+Benchmarks the initial data process against the test database with synthetic app graphs. Every scenario builds a
+graph of initial data classes that each sync a number of accounts and runs it a few times, shifting a share of the
+synced accounts on every run after the first so that the deletion of stale objects is measured as well.
+Example:
+    python run_benchmarks.py --rows 1000 --churn 0.1 --output before.json
+    python run_benchmarks.py --rows 1000 --churn 0.1 --output after.json --compare before.json
+"""
+import json
+import sys
+import time
+from argparse import ArgumentParser
+from unittest.mock import patch
+
+import django
+
+from settings import configure_settings
+
+
+# Configure the default settings
+configure_settings()
+django.setup()
+
+# The initial data classes can only be imported once django is set up
+from django.db import connection, transaction
+from django.test.utils import setup_databases, teardown_databases
+
+from dynamic_initial_data.base import BaseInitialData, InitialDataUpdater
+from dynamic_initial_data.tests.models import Account
+
+
+def build_chain(size):
+    """
+    Builds a graph where every app depends on the previous app.
+    """
+    return {'app_{0}'.format(i): ['app_{0}'.format(i - 1)] if i else [] for i in range(size)}
+
+
+def build_fan(size):
+    """
+    Builds a graph where every app depends on the same root app.
+    """
+    return dict({'app_0': []}, **{'app_{0}'.format(i): ['app_0'] for i in range(1, size)})
+
+
+def build_diamond(size):
+    """
+    Builds a graph where the apps between a root app and a top app depend on the root app and the top app depends on
+    every app in between.
+    """
+    graph = build_fan(size - 1)
+    graph['app_{0}'.format(size - 1)] = [app for app in graph if app != 'app_0']
+    return graph
+
+
+GRAPH_BUILDERS = {
+    'chain': build_chain,
+    'fan': build_fan,
+    'diamond': build_diamond,
+}
+
+
+def build_initial_data_classes(graph, rows, offset):
+    """
+    Builds an initial data class for every app of a graph. Every class syncs its own accounts, starting at an offset
+    so that the accounts before the offset become stale.
+    """
+    def update_initial_data(self):
+        self.sync(Account, [
+            {'name': '{0}-{1}'.format(self.app, i)}
+            for i in range(offset, offset + rows)
+        ], ['name'])
+
+    return {
+        app: type(app, (BaseInitialData,), {
+            'app': app,
+            'dependencies': dependencies,
+            'update_initial_data': update_initial_data,
+        })
+        for app, dependencies in graph.items()
+    }
+
+
+def time_call(timings, name, function, *args, **kwargs):
+    """
+    Calls a function and adds the time it took to the timings under a name.
+    """
+    start_time = time.perf_counter()
+    try:
+        return function(*args, **kwargs)
+    finally:
+        timings[name] = timings.get(name, 0) + time.perf_counter() - start_time
+
+
+def run_scenario(graph, rows, churn, runs):
+    """
+    Runs the initial data process of a graph several times and returns the timings of every run.
+    """
+    results = []
+    for run in range(runs):
+        initial_data_classes = build_initial_data_classes(graph, rows, int(run * rows * churn))
+        timings = {}
+        with patch.object(InitialDataUpdater, 'load_app', side_effect=initial_data_classes.get):
+            # The plan of every app walks the whole graph, whereas the call list of a single app only walks the apps it
+            # reaches, which can be a single leaf
+            time_call(timings, 'get_update_plan', InitialDataUpdater().get_update_plan, list(graph))
+
+            # Deletions are timed on their own while they are handled as part of the update of all apps
+            updater = InitialDataUpdater()
+            handle_deletions = updater.handle_deletions
+            updater.handle_deletions = lambda *args: time_call(timings, 'handle_deletions', handle_deletions, *args)
+
+            # The synthetic apps are not installed, so they are updated the same way update_all_apps does
+            time_call(timings, 'update_all_apps', updater.update_apps, list(graph), reconcile_all_apps=True)
+
+        results.append(dict(timings, run=run))
+    return results
+
+
+def run_benchmarks(graphs, sizes, rows, churn, runs):
+    """
+    Runs every scenario in a transaction that is rolled back so that scenarios don't affect each other.
+    """
+    results = []
+    for graph_name in graphs:
+        for size in sizes:
+            with transaction.atomic():
+                scenario_results = run_scenario(GRAPH_BUILDERS[graph_name](size), rows, churn, runs)
+                transaction.set_rollback(True)
+
+            for result in scenario_results:
+                results.append(dict(result, graph=graph_name, size=size, rows=rows, churn=churn))
+                print_result(results[-1])
+    return results
+
+
+def get_scenario_key(result):
+    return result['graph'], result['size'], result['rows'], result['churn'], result['run']
+
+
+def print_result(result, previous_result=None):
+    """
+    Prints the timings of a run along with how they compare to a previous run of the same scenario. Timings that
+    the previous run does not have, such as those of results files written by older versions, are not compared.
+    """
+    timings = []
+    for name in ['get_update_plan', 'update_all_apps', 'handle_deletions']:
+        timing = '{0}={1:.4f}s'.format(name, result[name])
+        if previous_result and previous_result.get(name):
+            timing += ' ({0:+.1%})'.format(result[name] / previous_result[name] - 1)
+        timings.append(timing)
+    print('{0} size={1} rows={2} churn={3} run={4}: {5}'.format(
+        result['graph'], result['size'], result['rows'], result['churn'], result['run'], ' '.join(timings)))
+
+
+def compare_results(results, previous_results):
+    """
+    Prints the results of the scenarios that were also run before along with the change of every timing.
+    """
+    previous_results = {get_scenario_key(result): result for result in previous_results}
+    print('\nCompared to the previous results:')
+    for result in results:
+        previous_result = previous_results.get(get_scenario_key(result))
+        if previous_result:
+            print_result(result, previous_result)
+
+
+def main(options):
+    old_config = setup_databases(verbosity=0, interactive=False)
+    try:
+        results = run_benchmarks(options.graphs, options.sizes, options.rows, options.churn, options.runs)
+    finally:
+        teardown_databases(old_config, verbosity=0)
+
+    with open(options.output, 'w') as output_file:
+        json.dump({'vendor': connection.vendor, 'results': results}, output_file, indent=2)
+
+    if options.compare:
+        with open(options.compare) as previous_file:
+            compare_results(results, json.load(previous_file)['results'])
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser()
+    parser.add_argument('--graphs', nargs='+', choices=sorted(GRAPH_BUILDERS), default=sorted(GRAPH_BUILDERS))
+    parser.add_argument('--sizes', nargs='+', type=int, default=[10, 50])
+    parser.add_argument('--rows', type=int, default=100, help='The number of accounts synced by every app')
+    parser.add_argument('--churn', type=float, default=0.1, help='The share of accounts replaced on every run')
+    parser.add_argument('--runs', type=int, default=3, help='The number of runs of every scenario')
+    parser.add_argument('--output', default='benchmark_results.json', help='The file the results are written to')
+    parser.add_argument('--compare', default=None, help='A previous results file to compare the results to')
+
+    sys.exit(main(parser.parse_args()))
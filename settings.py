@@ -73,6 +73,8 @@ def configure_settings():
             NOSE_ARGS=['--nocapture', '--nologcapture', '--verbosity=1'],
             DATABASES={
                 'default': db_config,
+                # A second database for updating many databases, which is only created for the tests that use it
+                'other': dict(db_config, TEST={'NAME': 'test_{0}_other'.format(db_config['NAME'])}),
             },
             INSTALLED_APPS=installed_apps,
             MIDDLEWARE=middleware,